@@ -2,7 +2,9 @@
 FastAPI dependencies
 """
 
+from typing import AsyncIterator
 from fastapi import Request, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from domain.agentic.orchestrator import AgentOrchestrator
 from services.document_service import DocumentService
 from services.ingestion_service import IngestionService
@@ -34,3 +36,8 @@ def get_retrieval_service(request: Request) -> RetrievalService:
 def get_evaluation_service(request: Request) -> EvaluationService:
     return request.app.state.evaluation_service
 
+
+async def get_db_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """One read transaction per request, shared by store calls that accept `session`"""
+    async with request.app.state.document_sql_store.SessionLocal.begin() as session:
+        yield session
@@ -2,7 +2,12 @@
 Agentic query endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+import time
+from typing import Tuple
+from weakref import WeakKeyDictionary
+
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import ORJSONResponse
 from domain.agentic.orchestrator import AgentOrchestrator
 from api.schemas.agent import (
     AgentQueryRequest, 
@@ -15,7 +20,12 @@ from api.schemas.agent import (
 from api.dependencies import get_agent_orchestrator, get_retrieval_service
 from services.retrieval_service import RetrievalService
 
-router = APIRouter(prefix="/api/v1/agent", tags=["agent"])
+router = APIRouter(prefix="/api/v1/agent", tags=["agent"], default_response_class=ORJSONResponse)
+
+# Serialized /tools response per orchestrator: (expires_at, json_bytes). Tools are static per
+# MCP session; weak keys so a replaced orchestrator (new app instance, tests) never sees another's list.
+_TOOLS_CACHE_TTL = 60.0
+_tools_cache: "WeakKeyDictionary[AgentOrchestrator, Tuple[float, bytes]]" = WeakKeyDictionary()
 
 
 @router.post("/query", response_model=AgentQueryResponse)
@@ -84,16 +94,21 @@ async def list_agent_tools(
         HTTPException: If tool listing fails (500 status code with error details)
     """
     try:
-        all_tools = orchestrator.list_tools()
-        tools = [
-            ToolInfo(
-                name=tool.name,
-                description=tool.description,
-                input_schema=tool.input_schema,
-            )
-            for tool in all_tools
-        ]
-        return ToolsResponse(tools=tools)
+        now = time.monotonic()
+        cached = _tools_cache.get(orchestrator)
+        if cached is None or cached[0] <= now:
+            all_tools = orchestrator.list_tools()
+            tools = [
+                ToolInfo(
+                    name=tool.name,
+                    description=tool.description,
+                    input_schema=tool.input_schema,
+                )
+                for tool in all_tools
+            ]
+            payload = ToolsResponse(tools=tools).model_dump_json().encode("utf-8")
+            cached = _tools_cache[orchestrator] = (now + _TOOLS_CACHE_TTL, payload)
+        return Response(content=cached[1], media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
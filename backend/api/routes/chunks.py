@@ -5,8 +5,9 @@ Chunk management API endpoints
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.dependencies import get_document_service
+from api.dependencies import get_document_service, get_db_session
 from api.schemas.chunks import (
     ChunkInfo,
     ChunkListResponse,
@@ -23,17 +24,12 @@ router = APIRouter(prefix="/api/v1/chunks", tags=["chunks"])
 
 @router.get("", response_model=ChunkListResponse)
 async def list_chunks(
-    document_service: DocumentService = Depends(get_document_service)
+    document_service: DocumentService = Depends(get_document_service),
+    session: AsyncSession = Depends(get_db_session)
 ):
     """List chunks."""
     try:
-        # Get all chunks by listing all documents and their chunks
-        documents = await document_service.list_documents()
-        all_chunks = []
-        for doc in documents:
-            doc_chunks = await document_service.document_sql_store.get_chunks_by_document(doc["doc_id"])
-            all_chunks.extend(doc_chunks)
-        chunks = all_chunks
+        chunks = await document_service.list_chunks(session=session)
         
         return ChunkListResponse(
             chunks=[ChunkInfo(**chunk) for chunk in chunks],
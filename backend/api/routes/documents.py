@@ -3,8 +3,9 @@ Document management API endpoints
 """
 
 import logging
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Path
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, HTTPException, status, Path
+from fastapi.responses import FileResponse, Response
+from typing import AsyncIterator, List
 
 from api.dependencies import get_document_service
 from api.schemas.documents import (
@@ -17,6 +18,7 @@ from api.schemas.documents import (
     DocumentDeleteAllResponse,
 )
 from services.document_service import DocumentService
+from core.config import settings
 from core.exceptions import StorageError
 
 logger = logging.getLogger(__name__)
@@ -54,6 +56,7 @@ async def list_documents(
 
 @router.delete("/all", response_model=DocumentDeleteAllResponse)
 async def delete_all_documents(
+    background_tasks: BackgroundTasks,
     document_service: DocumentService = Depends(get_document_service)
 ):
     """
@@ -82,7 +85,7 @@ async def delete_all_documents(
                 continue
                 
             try:
-                await document_service.delete_document(doc_id)
+                await document_service.delete_document(doc_id, background_tasks=background_tasks)
                 deleted_count += 1
                 logger.info(f"Successfully deleted document {doc_id}")
             except Exception as e:
@@ -108,10 +111,15 @@ async def get_document(
     doc_id: str = Path(..., description="Document ID to retrieve"),
     document_service: DocumentService = Depends(get_document_service)
 ):
-    """Get document metadata by document ID."""
+    """
+    Get document metadata by document ID.
+    
+    Returns the cached pre-serialized JSON directly, skipping per-request
+    dict building and response model encoding.
+    """
     try:
-        result = await document_service.get_document(doc_id)
-        return DocumentInfo(**result)
+        doc_json = await document_service.get_document_json(doc_id)
+        return Response(content=doc_json, media_type="application/json")
     except StorageError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND if "not found" in str(e).lower() else status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -125,8 +133,38 @@ async def get_document(
         )
 
 
+@router.get("/{doc_id}/file", response_class=FileResponse)
+async def get_document_file(
+    doc_id: str = Path(..., description="Document ID whose PDF to download"),
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    Download the stored PDF of a document.
+    
+    Served with FileResponse, which sends the file with sendfile where available
+    instead of reading it into memory.
+    """
+    try:
+        file_path = await document_service.file_store.resolve_existing_path(doc_id)
+        if file_path is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"File for document {doc_id} not found"
+            )
+        return FileResponse(file_path, media_type="application/pdf", filename=file_path.name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error getting file for document {doc_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get document file"
+        )
+
+
 @router.delete("/{doc_id}", response_model=DocumentDeleteResponse)
 async def delete_document(
+    background_tasks: BackgroundTasks,
     doc_id: str = Path(..., description="Document ID to delete"),
     document_service: DocumentService = Depends(get_document_service)
 ):
@@ -138,9 +176,12 @@ async def delete_document(
     - Document file
     - Chunk files
     - Single and multi vector embeddings from vector stores
+    
+    Metadata is deleted before responding; file and embedding cleanup
+    runs in the background after the response is sent.
     """
     try:
-        result = await document_service.delete_document(doc_id)
+        result = await document_service.delete_document(doc_id, background_tasks=background_tasks)
         return DocumentDeleteResponse(**result)
     except StorageError as e:
         raise HTTPException(
@@ -155,6 +196,12 @@ async def delete_document(
         )
 
 
+async def _iter_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    """Yield the uploaded file in fixed-size chunks."""
+    while chunk := await file.read(settings.upload_chunk_size):
+        yield chunk
+
+
 @router.post("/uploads", response_model=DocumentUploadsResponse, status_code=status.HTTP_201_CREATED)
 async def upload_documents(
     files: List[UploadFile] = File(..., description="PDF files to upload (one or more)"),
@@ -179,10 +226,10 @@ async def upload_documents(
                     failed_count += 1
                     continue
                 
-                file_content_bytes = await file.read()
                 result = await document_service.upload_document(
-                    file_content_bytes=file_content_bytes,
-                    doc_name=file.filename
+                    file_stream=_iter_upload(file),
+                    doc_name=file.filename,
+                    content_length=file.size
                 )
                 
                 uploaded_documents.append(DocumentUploadResponse(**result))
@@ -2,6 +2,7 @@
 Application startup and initialization logic
 """
 
+import asyncio
 import logging
 from fastapi import FastAPI, HTTPException
 
@@ -17,6 +18,8 @@ from core.exceptions import MCPConnectionError, LLMError, EmbeddingError
 from storage import SingleVectorStore, MultiVectorStore
 from storage.document_sql_store import DocumentSQLStore
 from storage.file_store import FileStore
+from storage.embedding_cache import EmbeddingCache
+from storage.postgres_multi_vector_store import PostgresMultiVectorStore
 from domain.rag.embedding.client import JinaEmbeddingClient
 from services.ingestion_service import IngestionService
 from services.embedding_service import EmbeddingService
@@ -71,9 +74,28 @@ async def initialize_rag_system(app: FastAPI):
     """
     # Initialize stores
     single_vector_store = SingleVectorStore()
-    multi_vector_store = MultiVectorStore()
+    await single_vector_store.warmup()
     document_sql_store = DocumentSQLStore()
+    await document_sql_store.init()
+    if settings.multi_vector_backend == "postgres":
+        multi_vector_store = PostgresMultiVectorStore(document_sql_store)
+        await multi_vector_store.init()
+    else:
+        multi_vector_store = MultiVectorStore()
     file_store = FileStore()
+    # Files from the old flat layout: point doc_path at the shard path first, then move the
+    # files, so an interrupted migration is simply redone on the next start
+    flat_doc_ids = await asyncio.to_thread(file_store.list_flat_doc_ids)
+    if flat_doc_ids:
+        await document_sql_store.update_doc_paths(
+            {doc_id: str(file_store.get_file_path(doc_id)) for doc_id in flat_doc_ids}
+        )
+        await asyncio.to_thread(file_store.move_flat_files, flat_doc_ids)
+    
+    embedding_cache = None
+    if settings.ingestion_cache_enabled:
+        embedding_cache = EmbeddingCache(document_sql_store)
+        await embedding_cache.init()
     
     # Initialize RAG services
     document_service = DocumentService(
@@ -88,6 +110,7 @@ async def initialize_rag_system(app: FastAPI):
         multi_vector_store=multi_vector_store,
         chunk_embedding_client=JinaEmbeddingClient(task="retrieval.passage"),
         query_embedding_client=JinaEmbeddingClient(task="retrieval.query"),
+        embedding_cache=embedding_cache,
     )
     ingestion_service = IngestionService(
         document_sql_store=document_sql_store,
@@ -131,10 +154,34 @@ async def cleanup_agentic_system(app: FastAPI):
 
 
 async def cleanup_rag_system(app: FastAPI):
-    """Cleanup RAG system resources (embedding service HTTP connections)."""
+    """Cleanup RAG system resources (embedding service HTTP connections, split worker processes, pending multi-vector index writes, Chroma worker threads, DB pool)."""
     if hasattr(app.state, 'embedding_service') and app.state.embedding_service:
         try:
             await app.state.embedding_service.close()
             logger.info("Embedding service cleaned up")
         except Exception as e:
             logger.error(f"Error during embedding service cleanup: {e}", exc_info=True)
+    if hasattr(app.state, 'ingestion_service') and app.state.ingestion_service:
+        try:
+            await app.state.ingestion_service.close()
+            logger.info("Ingestion service cleaned up")
+        except Exception as e:
+            logger.error(f"Error during ingestion service cleanup: {e}", exc_info=True)
+    if hasattr(app.state, 'multi_vector_store') and app.state.multi_vector_store:
+        try:
+            await app.state.multi_vector_store.flush()
+            logger.info("Multi-vector store flushed")
+        except Exception as e:
+            logger.error(f"Error during multi-vector store flush: {e}", exc_info=True)
+    if hasattr(app.state, 'single_vector_store') and app.state.single_vector_store:
+        try:
+            await app.state.single_vector_store.close()
+            logger.info("Single vector store worker threads stopped")
+        except Exception as e:
+            logger.error(f"Error during single vector store cleanup: {e}", exc_info=True)
+    if hasattr(app.state, 'document_sql_store') and app.state.document_sql_store:
+        try:
+            await app.state.document_sql_store.close()
+            logger.info("Document SQL store connections closed")
+        except Exception as e:
+            logger.error(f"Error during document SQL store cleanup: {e}", exc_info=True)
@@ -77,7 +77,8 @@ class MCPClient:
             self.logger.info(
                 f"Available tools: {[tool['function']['name'] for tool in self.tools]}"
             )
-            self.logger.debug(f"Tools format: {self.tools[0] if self.tools else 'No tools'}")
+            # Lazy %-formatting: tool schemas can be large, only render them when DEBUG is on
+            self.logger.debug("First tool structure: %r", self.tools[0] if self.tools else "No tools")
             
             return True
             
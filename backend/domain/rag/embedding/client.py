@@ -6,6 +6,7 @@ import logging
 import asyncio
 from typing import List, Dict, Any, Optional, Literal, Tuple
 import time
+import json
 import httpx
 import base64
 from core.config import settings
@@ -30,7 +31,9 @@ class JinaEmbeddingClient:
         model: str = None,
         timeout: int = None,
         max_retries: int = None,
-        rate_limit: int = None
+        rate_limit: int = None,
+        normalized: bool = None,
+        binary_upload: bool = None
     ):
         if task not in ("retrieval.query", "retrieval.passage"):
             raise ValueError(
@@ -47,6 +50,9 @@ class JinaEmbeddingClient:
         self.timeout = timeout or settings.jina_timeout
         self.max_retries = max_retries or settings.jina_max_retries
         self.rate_limit = rate_limit or settings.jina_rate_limit
+        self.normalized = settings.jina_normalized if normalized is None else normalized
+        # Capability flag: endpoint accepts multipart/form-data with raw PDF bytes
+        self.supports_binary = settings.jina_binary_upload if binary_upload is None else binary_upload
 
         # Connection pool
         self._client: Optional[httpx.AsyncClient] = None
@@ -60,9 +66,9 @@ class JinaEmbeddingClient:
         if self._client is None:
             self._client = httpx.AsyncClient(
                 timeout=self.timeout,
+                # Content-Type is set per request (JSON or multipart)
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
                 }
             )
         return self._client
@@ -117,6 +123,7 @@ class JinaEmbeddingClient:
             embeddings=mv_data_resp['data'][0]["embeddings"],  # (755, 128)
             text=text,
             model_embed=self.model + "__" + self.task,
+            unit_norm=self.normalized,
         )
         
         return EmbeddingResult(
@@ -131,10 +138,20 @@ class JinaEmbeddingClient:
 
         await self._rate_limit()  # Rate limit before each API call
         client = await self._get_client()
-        response = await client.post(
-            self.api_url,
-            json={**payload, "return_multivector": return_multivector},
-        )
+        if isinstance(payload["input"], bytes):
+            # Raw PDF bytes: send as multipart/form-data to skip base64 inflation
+            form = {k: json.dumps(v) if not isinstance(v, str) else v for k, v in payload.items() if k != "input"}
+            form["return_multivector"] = json.dumps(return_multivector)
+            response = await client.post(
+                self.api_url,
+                data=form,
+                files={"input": ("chunk.pdf", payload["input"], "application/pdf")},
+            )
+        else:
+            response = await client.post(
+                self.api_url,
+                json={**payload, "return_multivector": return_multivector},
+            )
         response.raise_for_status()
         return response
 
@@ -155,6 +172,8 @@ class JinaEmbeddingClient:
             "truncate": True,
             "input": input_payload,
         }
+        if self.normalized:
+            payload["normalized"] = True
         
         sv_response, mv_response = await asyncio.gather(
             self._make_api_call(payload, return_multivector=False),
@@ -190,10 +209,22 @@ class JinaEmbeddingClient:
 
         except httpx.HTTPStatusError as e:
             logger.error(f"Jina API error: {e.response.status_code} - {e.response.text}")
-            raise EmbeddingError(f"Jina API error: {e.response.status_code}")
+            raise EmbeddingError(f"Jina API error: {e.response.status_code}") from e
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
-            raise EmbeddingError(f"Failed to generate embeddings: {e}")
+            raise EmbeddingError(f"Failed to generate embeddings: {e}") from e
+    
+
+    async def embed_binary(self, embedables: List[Dict[str, Any]]) -> List[EmbeddingResult]:
+        """
+        Generate embeddings for embedables whose 'pdf' is raw bytes.
+        
+        Requests are sent as multipart/form-data. Only valid when the client
+        was configured with binary upload support.
+        """
+        if not self.supports_binary:
+            raise EmbeddingError("Binary upload not enabled for this client; use embed() with base64 input")
+        return await self.embed(embedables)
     
 
     async def close(self):
@@ -20,6 +20,7 @@ class MultiVectorEmbedding(BaseModel):
     embeddings: List[List[float]]  # List of vectors
     text: Optional[str] = None 
     model_embed: Optional[str] = None
+    unit_norm: bool = False  # True if each vector is already L2-normalized
 
 
 class EmbeddingResult(BaseModel):
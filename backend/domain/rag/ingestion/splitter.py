@@ -13,6 +13,12 @@ from storage.document_sql_store import ChunkSource, ChunkLevel
 
 logger = logging.getLogger(__name__)
 
+# Plain-text extraction flags shared by ingestion and retrieval's "fitz" backend, so stored and
+# re-extracted chunk text match (the optional "pypdfium2" backend extracts text differently).
+# Same as PyMuPDF's "text" defaults minus TEXT_CID_FOR_UNKNOWN_UNICODE; TEXT_INHIBIT_SPACES
+# is deliberately not set (it glues words on tightly kerned pages).
+PDF_TEXT_FLAGS = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
 
 class PDFSplitter:
     """Splits PDFs into page chunks"""
@@ -52,6 +58,10 @@ class PDFSplitter:
                         )
                         dest_doc.save(chunk_path)
 
+                    # Extract page text once here so retrieval never has to reopen the chunk PDF
+                    # (Postgres text columns reject NUL bytes)
+                    chunk_text = src_doc[i].get_text("text", flags=PDF_TEXT_FLAGS).replace("\x00", "")
+
                     chunks.append({
                         "chunk_id": chunk_id,
                         "pdf_id": pdf_id,
@@ -59,6 +69,7 @@ class PDFSplitter:
                         "chunk_path": chunk_path,
                         "chunk_source": ChunkSource.PDF.value,
                         "chunk_level": ChunkLevel.PAGE.value,
+                        "chunk_text": chunk_text,
                     })
 
             logger.info(f"Split PDF {pdf_name} into {len(chunks)} page chunks")
@@ -74,3 +85,13 @@ class PDFSplitter:
         content = f"{identifier}:{page_number}"
         return hashlib.sha256(content.encode()).hexdigest()[:16]
 
+
+
+def split_pdf_and_store_page_chunks(
+    chunk_dir: str,
+    pdf_id: str,
+    pdf_path: str,
+    pdf_name: str,
+) -> List[Dict[str, Any]]:
+    """Module-level entry point for worker processes (picklable by reference, unlike a bound method)"""
+    return PDFSplitter(chunk_dir=chunk_dir).split_pdf_and_store_page_chunks(pdf_id, pdf_path, pdf_name)
@@ -4,7 +4,7 @@ Retrieval pipeline
 
 from domain.rag.retrieval.ann_retriever import ANNRetriever
 from domain.rag.retrieval.reranker import Reranker
-from domain.rag.retrieval.similarity import maxsim_score, cosine_similarity
+from domain.rag.retrieval.similarity import maxsim_score, maxsim_score_batch, cosine_similarity
 from domain.rag.retrieval.types import RetrievalResult
 
 __all__ = [
@@ -12,6 +12,7 @@ __all__ = [
     "Reranker",
     "RetrievalResult",
     "maxsim_score",
+    "maxsim_score_batch",
     "cosine_similarity",
 ]
 
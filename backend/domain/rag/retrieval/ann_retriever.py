@@ -4,7 +4,9 @@ ANN retrieval using single vectors
 
 import logging
 from typing import List, Dict, Any
+
 from domain.rag.retrieval.types import RetrievalResult
+from storage.base import Vectors
 from storage.single_vector_store import SingleVectorStore
 from core.exceptions import RetrievalError
 
@@ -19,7 +21,7 @@ class ANNRetriever:
     
     async def retrieve(
         self,
-        query_vectors: List[List[float]],
+        query_vectors: Vectors,
         top_k: int = 10,
         filter: Dict[str, Any] = None
     ) -> List[List[Dict[str, Any]]]:
@@ -27,7 +29,7 @@ class ANNRetriever:
         Retrieve documents using ANN search for multiple query vectors.
         
         Args:
-            query_vectors: List of query embedding vectors
+            query_vectors: Query embedding vectors, as an [N, D] float32 array (lists are converted)
             top_k: Number of results to return per query
             filter: Optional metadata filter
             
@@ -38,7 +40,7 @@ class ANNRetriever:
             - 'metadata': Dict[str, Any] - Chunk metadata (includes 'chunk_name' and other fields)
         """
         try:
-            if not query_vectors:
+            if len(query_vectors) == 0:
                 raise RetrievalError("query_vectors list must not be empty")
             
             # Query vector store with all query vectors at once
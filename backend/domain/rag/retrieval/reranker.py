@@ -2,11 +2,13 @@
 MaxSim reranking using multi-vectors
 """
 
+import asyncio
+import heapq
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from domain.rag.retrieval.types import RetrievalResult
 from storage.multi_vector_store import MultiVectorStore
-from domain.rag.retrieval.similarity import maxsim_score
+from domain.rag.retrieval.similarity import maxsim_score_batch
 from core.exceptions import RetrievalError
 
 logger = logging.getLogger(__name__)
@@ -21,14 +23,24 @@ class Reranker:
     async def rerank(
         self,
         query_multi_vectors: List[List[float]],
-        candidates: List[Dict[str, Any]]
+        candidates: List[Dict[str, Any]],
+        top_n: Optional[int] = None,
+        query_unit_norm: bool = False,
+        preloaded: Optional[Dict[str, List[List[float]]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Rerank candidates using MaxSim scoring.
         
+        Multi-vectors are fetched with one batch_get (unless preloaded) and all
+        candidates are scored together by rerank_batch.
+        
         Args:
             query_multi_vectors: List of query token embedding vectors
             candidates: List of candidate results from ANN search
+            top_n: Optional number of top results to return. If None, all candidates are returned.
+            query_unit_norm: Whether query multi-vectors are already L2-normalized
+            preloaded: Optional multi-vectors already fetched for the candidates, keyed by chunk_id.
+                      When given, the store is not queried.
             
         Returns:
             List of dicts matching RetrievalResult structure:
@@ -36,35 +48,99 @@ class Reranker:
             - 'score': float - MaxSim score (higher is better)
             - 'metadata': Dict[str, Any] - Chunk metadata (includes 'chunk_name' and other fields, preserved from input)
         """
-        try:
-            # Get multi-vectors for all candidates
-            chunk_ids = [c["chunk_id"] for c in candidates]
-            chunk_multi_vectors_dict = await self.multi_vector_store.batch_get(chunk_ids)
-            
-            # Compute MaxSim scores
-            reranked = []
-            for candidate in candidates:
-                chunk_id = candidate["chunk_id"]
-                chunk_multi_vectors = chunk_multi_vectors_dict.get(chunk_id)
-                
-                if chunk_multi_vectors:
-                    maxsim = maxsim_score(query_multi_vectors, chunk_multi_vectors)
-                    # Create new dict to avoid mutating original, preserving all fields
-                    reranked_candidate = {
-                        "chunk_id": chunk_id,
-                        "score": maxsim,
-                        "metadata": candidate.get("metadata", {})
-                    }
-                    reranked.append(reranked_candidate)
-                else:
-                    # Fallback to original candidate if no multi-vectors (preserve all fields)
-                    reranked.append(candidate.copy())
-            
-            # Sort by MaxSim score (descending)
-            reranked.sort(key=lambda x: x["score"], reverse=True)
+        if preloaded is None:
+            try:
+                preloaded = await self.multi_vector_store.batch_get([c["chunk_id"] for c in candidates])
+            except Exception as e:
+                logger.error(f"Error in reranking: {e}")
+                raise RetrievalError(f"Reranking failed: {e}")
+        return await self.rerank_batch(
+            query_multi_vectors, preloaded, candidates, top_n=top_n, query_unit_norm=query_unit_norm
+        )
+    
+    async def rerank_batch(
+        self,
+        query_multi_vectors: List[List[float]],
+        chunk_multi_vectors: Dict[str, List[List[float]]],
+        candidates: List[Dict[str, Any]],
+        top_n: Optional[int] = None,
+        query_unit_norm: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Rerank candidates whose multi-vectors are already in memory.
+        
+        All candidates are scored with one fused MaxSim call (single GEMM over the
+        concatenated chunk tokens) in a worker thread; nothing is fetched from the store.
+        
+        Args:
+            query_multi_vectors: List of query token embedding vectors
+            chunk_multi_vectors: Multi-vectors keyed by chunk_id (candidates missing here keep their ANN score)
+            candidates: List of candidate results from ANN search
+            top_n: Optional number of top results to return. If None, all candidates are returned.
+            query_unit_norm: Whether query multi-vectors are already L2-normalized
             
-            return reranked
+        Returns:
+            Reranked candidates, same structure as rerank()
+        """
+        try:
+            candidate_vectors = {
+                c["chunk_id"]: chunk_multi_vectors.get(c["chunk_id"]) for c in candidates
+            }
+            scores = await asyncio.to_thread(
+                self._score_batch, query_multi_vectors, candidate_vectors, query_unit_norm
+            )
+            return self._merge_scores(candidates, scores, top_n)
         except Exception as e:
             logger.error(f"Error in reranking: {e}")
             raise RetrievalError(f"Reranking failed: {e}")
-
+    
+    def _score_batch(
+        self,
+        query_multi_vectors: List[List[float]],
+        chunk_multi_vectors_dict: Dict[str, List[List[float]]],
+        query_unit_norm: bool = False
+    ) -> Dict[str, float]:
+        """Compute MaxSim scores for a batch of chunks (pure CPU, no I/O)."""
+        chunk_ids = [
+            chunk_id for chunk_id, vectors in chunk_multi_vectors_dict.items()
+            if vectors is not None and len(vectors) > 0
+        ]
+        batch_scores = maxsim_score_batch(
+            query_multi_vectors,
+            [chunk_multi_vectors_dict[chunk_id] for chunk_id in chunk_ids],
+            query_unit_norm=query_unit_norm
+        )
+        return dict(zip(chunk_ids, batch_scores))
+    
+    def _merge_scores(
+        self,
+        candidates: List[Dict[str, Any]],
+        scores: Dict[str, float],
+        top_n: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Attach MaxSim scores to candidates and rank them."""
+        reranked = []
+        for candidate in candidates:
+            chunk_id = candidate["chunk_id"]
+            maxsim = scores.get(chunk_id)
+            
+            if maxsim is not None:
+                # Create new dict to avoid mutating original, preserving all fields
+                reranked_candidate = {
+                    "chunk_id": chunk_id,
+                    "score": maxsim,
+                    "metadata": candidate.get("metadata", {})
+                }
+                reranked.append(reranked_candidate)
+            else:
+                # Fallback to original candidate if no multi-vectors (preserve all fields)
+                reranked.append(candidate.copy())
+        
+        # Partial selection when only the top results are needed
+        if top_n is not None:
+            return heapq.nlargest(top_n, reranked, key=lambda x: x["score"])
+        
+        # Sort by MaxSim score (descending)
+        reranked.sort(key=lambda x: x["score"], reverse=True)
+        
+        return reranked
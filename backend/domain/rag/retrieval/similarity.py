@@ -3,7 +3,57 @@ Similarity functions (maxsim, cosine, dot product)
 """
 
 import numpy as np
-from typing import List
+from typing import List, Sequence
+
+# Optional: compiled MaxSim kernel - only used if numba is installed
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+
+# Pre-bound numpy functions for the maxsim hot path (avoids attribute lookups per call)
+_norm = np.linalg.norm
+_matmul = np.matmul
+_max = np.max
+_sum = np.sum
+_asarray = np.asarray
+_concatenate = np.concatenate
+_max_reduceat = np.maximum.reduceat
+_float32 = np.float32
+_ascontiguousarray = np.ascontiguousarray
+
+# Token embedding dim the compiled kernel is specialized for (ColBERT-style / Jina multi-vectors)
+MAXSIM_KERNEL_DIM = 128
+
+if NUMBA_AVAILABLE:
+    @njit("float32[:](float32[:, ::1], float32[:, ::1], int32[::1])", cache=True, fastmath=True)
+    def _maxsim_d128(q, chunks, offsets):
+        """
+        MaxSim per chunk for normalized float32 vectors of dim 128.
+        
+        offsets has length C + 1; chunk c spans rows offsets[c]:offsets[c + 1] of chunks.
+        The constant inner dimension lets LLVM fully unroll and vectorize the dot product.
+        """
+        D = 128
+        num_chunks = offsets.shape[0] - 1
+        scores = np.zeros(num_chunks, dtype=np.float32)
+        for c in range(num_chunks):
+            start = offsets[c]
+            end = offsets[c + 1]
+            total = np.float32(0.0)
+            for i in range(q.shape[0]):
+                best = np.float32(-np.inf)
+                for j in range(start, end):
+                    dot = np.float32(0.0)
+                    for k in range(D):
+                        dot += q[i, k] * chunks[j, k]
+                    if dot > best:
+                        best = dot
+                total += best
+            scores[c] = total
+        return scores
 
 
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
@@ -23,7 +73,9 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
 
 def maxsim_score(
     query_multi_vectors: List[List[float]],
-    chunk_multi_vectors: List[List[float]]
+    chunk_multi_vectors: List[List[float]],
+    query_unit_norm: bool = False,
+    chunk_unit_norm: bool = False
 ) -> float:
     """
     Compute MaxSim score between query and chunk multi-vectors (vectorized).
@@ -38,38 +90,95 @@ def maxsim_score(
     Args:
         query_multi_vectors: List of query token embedding vectors
         chunk_multi_vectors: List of chunk token embedding vectors
+        query_unit_norm: Whether query vectors are already L2-normalized (skips normalization)
+        chunk_unit_norm: Whether chunk vectors are already L2-normalized (skips normalization)
     
     Returns:
         MaxSim score
     """
-    if not query_multi_vectors or not chunk_multi_vectors:
+    if len(query_multi_vectors) == 0 or len(chunk_multi_vectors) == 0:
         return 0.0
     
-    # Convert to numpy arrays for vectorized operations
-    query_arr = np.array(query_multi_vectors)  # Shape: [Nq, d]
-    chunk_arr = np.array(chunk_multi_vectors)  # Shape: [Nc, d]
-    
-    # Normalize vectors (for cosine similarity)
-    query_norm = np.linalg.norm(query_arr, axis=1, keepdims=True)
-    chunk_norm = np.linalg.norm(chunk_arr, axis=1, keepdims=True)
+    # Convert to float32 numpy arrays for vectorized operations (SGEMM instead of DGEMM)
+    query_arr = _asarray(query_multi_vectors, dtype=_float32)  # Shape: [Nq, d]
+    chunk_arr = _asarray(chunk_multi_vectors, dtype=_float32)  # Shape: [Nc, d]
     
-    # Avoid division by zero
-    query_arr = query_arr / (query_norm + 1e-8)
-    chunk_arr = chunk_arr / (chunk_norm + 1e-8)
+    # Normalize vectors (for cosine similarity), unless already unit-norm
+    # Add epsilon to avoid division by zero
+    if not query_unit_norm:
+        query_norm = _norm(query_arr, axis=1, keepdims=True)
+        query_arr = query_arr / (query_norm + 1e-8)
+    if not chunk_unit_norm:
+        chunk_norm = _norm(chunk_arr, axis=1, keepdims=True)
+        chunk_arr = chunk_arr / (chunk_norm + 1e-8)
     
     # Compute similarity matrix: [Nq, Nc]
     # Each element (i, j) is cosine similarity between query_vec_i and chunk_vec_j
-    similarity_matrix = np.matmul(query_arr, chunk_arr.T)
+    similarity_matrix = _matmul(query_arr, chunk_arr.T)
     
     # For each query token, find max similarity with any chunk token: [Nq]
-    max_similarities = np.max(similarity_matrix, axis=1)
+    max_similarities = _max(similarity_matrix, axis=1)
     
     # Sum all max similarities
-    total_maxsim = float(np.sum(max_similarities))
+    total_maxsim = float(_sum(max_similarities))
     
     return total_maxsim
 
 
+def maxsim_score_batch(
+    query_multi_vectors: List[List[float]],
+    chunk_multi_vectors_list: Sequence[List[List[float]]],
+    query_unit_norm: bool = False,
+    chunk_unit_norm: bool = False
+) -> List[float]:
+    """
+    Compute MaxSim scores between a query and several chunks with a single GEMM.
+    
+    Chunk token vectors are concatenated into one [sum(Nc), d] matrix, multiplied
+    against the query once, then reduced per chunk using the chunk offsets.
+    
+    Args:
+        query_multi_vectors: List of query token embedding vectors
+        chunk_multi_vectors_list: Sequence of chunk multi-vectors (each non-empty)
+        query_unit_norm: Whether query vectors are already L2-normalized (skips normalization)
+        chunk_unit_norm: Whether chunk vectors are already L2-normalized (skips normalization)
+    
+    Returns:
+        List of MaxSim scores, one per chunk (same order as input)
+    """
+    if not len(chunk_multi_vectors_list):
+        return []
+    if not len(query_multi_vectors):
+        return [0.0] * len(chunk_multi_vectors_list)
+    
+    query_arr = _asarray(query_multi_vectors, dtype=_float32)  # Shape: [Nq, d]
+    
+    # Offsets of each chunk within the concatenated matrix (length C + 1)
+    offsets = np.cumsum([0] + [len(c) for c in chunk_multi_vectors_list])
+    # Concatenate at stored precision, then cast once (no per-chunk float32 copies)
+    chunk_arr = _concatenate(chunk_multi_vectors_list, axis=0).astype(_float32, copy=False)  # Shape: [sum(Nc), d]
+    
+    if not query_unit_norm:
+        query_arr = query_arr / (_norm(query_arr, axis=1, keepdims=True) + 1e-8)
+    if not chunk_unit_norm:
+        chunk_arr = chunk_arr / (_norm(chunk_arr, axis=1, keepdims=True) + 1e-8)
+    
+    # Dispatch to the compiled kernel for the specialized embedding dim
+    if NUMBA_AVAILABLE and query_arr.shape[1] == MAXSIM_KERNEL_DIM:
+        return _maxsim_d128(
+            _ascontiguousarray(query_arr, dtype=_float32),
+            _ascontiguousarray(chunk_arr, dtype=_float32),
+            offsets.astype(np.int32),
+        ).tolist()
+    
+    # Similarity matrix against all chunk tokens: [Nq, sum(Nc)]
+    similarity_matrix = _matmul(query_arr, chunk_arr.T)
+    
+    # Max over each chunk's token segment: [Nq, C], then sum over query tokens: [C]
+    max_similarities = _max_reduceat(similarity_matrix, offsets[:-1], axis=1)
+    return _sum(max_similarities, axis=0).tolist()
+
+
 def dot_product(vec1: List[float], vec2: List[float]) -> float:
     """Compute dot product between two vectors"""
     return float(np.dot(np.array(vec1), np.array(vec2)))
@@ -2,20 +2,23 @@
 Document service - orchestrates document lifecycle management
 """
 
+import asyncio
 import logging
 import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-from io import BytesIO
+from typing import List, Dict, Any, Optional, AsyncIterator
+from datetime import datetime, timezone
 
 import fitz  # PyMuPDF
+from fastapi import BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from storage.base import BaseFileStore
 from storage.base import BaseDocumentSQLStore, BaseSingleVectorStore, BaseMultiVectorStore
 from services.base import BaseService
 from core.config import settings
 from core.exceptions import StorageError
+from utils.file_io import unlink_many
 
 logger = logging.getLogger(__name__)
 
@@ -43,19 +46,33 @@ class DocumentService(BaseService):
         self.multi_vector_store = multi_vector_store
     
 
-    def _extract_pdf_metadata(self, pdf_bytes: bytes) -> Dict[str, Any]:
+    def _extract_pdf_metadata(self, file_path: Path, file_size: int) -> Dict[str, Any]:
+        """
+        Extract author/abstract metadata from the PDF Info dict.
+        
+        Blocking; call via asyncio.to_thread. Only doc.metadata is read, so no
+        pages are loaded. PDFs above settings.metadata_fast_path_bytes are skipped.
+        """
+        if file_size > settings.metadata_fast_path_bytes:
+            logger.debug(f"Skipping PDF metadata extraction for {file_size} byte file")
+            return {
+                "authors": "",
+                "abstract": "",
+                "published": None
+            }
+        
         try:
-            doc = fitz.open(stream=BytesIO(pdf_bytes), filetype="pdf")
-            metadata = doc.metadata
-            authors = metadata.get("authors", "").strip() or metadata.get("author", "").strip()
-            abstract = metadata.get("summary", "").strip() or metadata.get("abstract", "").strip()
+            # File-path open; PyMuPDF reuses its process-global MuPDF context, and
+            # reading doc.metadata only touches the trailer/Info dict
+            with fitz.open(str(file_path), filetype="pdf") as doc:
+                metadata = doc.metadata or {}
+            authors = (metadata.get("authors") or "").strip() or (metadata.get("author") or "").strip()
+            abstract = (metadata.get("summary") or "").strip() or (metadata.get("abstract") or "").strip()
             
             # PDF metadata dates are strings, not datetime objects
             # We don't reliably get publication dates from PDF metadata
             published = None
             
-            doc.close()
-            
             return {
                 "authors": authors or "",
                 "abstract": abstract or "",
@@ -72,15 +89,17 @@ class DocumentService(BaseService):
 
     async def upload_document(
         self,
-        file_content_bytes: bytes,
-        doc_name: str
+        file_stream: AsyncIterator[bytes],
+        doc_name: str,
+        content_length: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        Upload a PDF document.
+        Upload a PDF document, streaming it to disk chunk by chunk.
         
         Args:
-            file_content_bytes: The content of the PDF file.
+            file_stream: Async iterator over the content of the PDF file.
             doc_name: The name of the document.
+            content_length: Declared size in bytes, if known, to reject oversized uploads early.
 
         Returns:
             Dictionary with document ID, name, size, upload date, status, path, authors, abstract, and published date
@@ -90,29 +109,43 @@ class DocumentService(BaseService):
             Exception: If an unexpected error occurs
         """
         try:
-            if not file_content_bytes:
-                raise StorageError("File content is empty")
-            
             # Check file size (max 50MB by default)
             max_size = settings.max_pdf_size_mb * 1024 * 1024
-            doc_size = len(file_content_bytes)
-            if doc_size > max_size:
+            if content_length is not None and content_length > max_size:
                 raise StorageError(f"File size exceeds maximum size ({settings.max_pdf_size_mb}MB)")
             
-            # Basic PDF header validation
-            if not file_content_bytes.startswith(b'%PDF'):
-                raise StorageError("Invalid PDF file")
+            doc_size = 0
+            
+            async def validated_stream() -> AsyncIterator[bytes]:
+                # Validate header and size as chunks arrive, aborting mid-stream
+                nonlocal doc_size
+                async for chunk in file_stream:
+                    if not chunk:
+                        continue
+                    # Basic PDF header validation
+                    if doc_size == 0 and not chunk.startswith(b'%PDF'):
+                        raise StorageError("Invalid PDF file")
+                    doc_size += len(chunk)
+                    if doc_size > max_size:
+                        raise StorageError(f"File size exceeds maximum size ({settings.max_pdf_size_mb}MB)")
+                    yield chunk
             
             # Store PDF file
             doc_id = str(uuid.uuid4())
-            file_path = await self.file_store.save_file(doc_id, file_content_bytes)
-            pdf_metadata = self._extract_pdf_metadata(file_content_bytes)
+            file_path = await self.file_store.save_file_stream(doc_id, validated_stream())
+            if doc_size == 0:
+                await self.file_store.delete_file(doc_id)
+                raise StorageError("File content is empty")
+            
+            pdf_metadata = await asyncio.to_thread(self._extract_pdf_metadata, file_path, doc_size)
 
+            # Naive UTC to match the DateTime column
+            upload_date = datetime.now(timezone.utc).replace(tzinfo=None)
             result = {
                 "doc_id": doc_id,
                 "doc_name": doc_name,
                 "doc_size": doc_size,
-                "upload_date": datetime.utcnow().isoformat(),
+                "upload_date": upload_date.isoformat(),
                 "status": "uploaded",
                 "doc_path": str(file_path),
                 "doc_authors": pdf_metadata["authors"],
@@ -120,8 +153,8 @@ class DocumentService(BaseService):
                 "doc_published": pdf_metadata["published"]
             }
             
-            # Store document record
-            await self.document_sql_store.upsert_document(**result)
+            # Store document record (pass the datetime itself, not its ISO string)
+            await self.document_sql_store.upsert_document(**{**result, "upload_date": upload_date})
             logger.info(f"Uploaded document {doc_id}: {doc_name} ({doc_size} bytes)")
             
             return result
@@ -131,7 +164,11 @@ class DocumentService(BaseService):
             raise StorageError(f"Failed to upload document: {str(e)}")
     
 
-    async def delete_document(self, doc_id: str) -> Dict[str, Any]:
+    async def delete_document(
+        self,
+        doc_id: str,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Dict[str, Any]:
         """
         Delete document and all associated data.
         
@@ -145,6 +182,8 @@ class DocumentService(BaseService):
 
         Args:
             doc_id: The ID of the document to delete.
+            background_tasks: If given, best-effort cleanup is scheduled to run after
+                the response is sent instead of being awaited here.
         
         Returns:
             Dictionary with document ID and status
@@ -154,73 +193,26 @@ class DocumentService(BaseService):
             Exception: If an unexpected error occurs
         """
         try:
-            doc_info = await self.document_sql_store.get_document_with_chunks(doc_id)
-            if not doc_info:
+            # Delete document and chunks metadata in one round-trip, getting the deleted chunks back
+            # If this fails, the entire operation should fail
+            deleted_chunks = await self.document_sql_store.delete_document_returning_chunks(doc_id)
+            if deleted_chunks is None:
                 raise StorageError(f"Document {doc_id} not found")
             
-            chunk_path_files_to_delete = [
-                path for chunk in doc_info.get("chunks", [])
-                if chunk.get("chunk_path") and (path := Path(chunk["chunk_path"])).exists()
+            chunk_paths = [
+                Path(chunk["chunk_path"]) for chunk in deleted_chunks
+                if chunk.get("chunk_path")
             ]
             chunk_ids = [
-                chunk.get("chunk_id") for chunk in doc_info.get("chunks", []) 
+                chunk.get("chunk_id") for chunk in deleted_chunks
                 if chunk.get("chunk_id")
             ]
             
-            # Delete document metadata (cascades to chunks metadata in DB)
-            # If this fails, the entire operation should fail
-            await self.document_sql_store.delete_document(doc_id)
-            
-            # Delete document file
-            # TODO: Use a background cleanup job in production
-            try:
-                await self.file_store.delete_file(doc_id)
-            except Exception as e:
-                logger.warning(
-                    f"Deleting document file '{doc_id}' failed (database already deleted): {e}. "
-                    "Clean up orphaned file later."
-                )
-            
-            # Delete chunk files
-            # TODO: use a background cleanup job in production
-            for chunk_path in chunk_path_files_to_delete:
-                try:
-                    chunk_path.unlink()
-                    logger.debug(f"Deleted chunk file: {chunk_path}")
-                except Exception as e:
-                    logger.warning(
-                        f"Deleting chunk file '{chunk_path}' failed: {e}. "
-                        "Clean up orphaned file later."
-                    )
-            
-            # Delete embeddings from vector stores
-            # TODO: use a background cleanup job in production
-            if chunk_ids:
-                # Delete from single vector store (ChromaDB)
-                if self.single_vector_store:
-                    for chunk_id in chunk_ids:
-                        try:
-                            await self.single_vector_store.delete(chunk_id)
-                            logger.debug(f"Deleted embedding from SingleVectorStore for chunk {chunk_id}")
-                        except Exception as e:
-                            logger.warning(
-                                f"Deleting embedding from SingleVectorStore for chunk '{chunk_id}' failed: {e}. "
-                                "Clean up orphaned embedding later."
-                            )
-                
-                # Delete from multi vector store (mmap files)
-                if self.multi_vector_store:
-                    for chunk_id in chunk_ids:
-                        try:
-                            await self.multi_vector_store.delete(chunk_id)
-                            logger.debug(f"Deleted embedding from MultiVectorStore for chunk {chunk_id}")
-                        except Exception as e:
-                            logger.warning(
-                                f"Deleting embedding from MultiVectorStore for chunk '{chunk_id}' failed: {e}. "
-                                "Clean up orphaned embedding later."
-                            )
-            
-            logger.info(f"Deleted document {doc_id} and {len(chunk_path_files_to_delete)} chunk files")
+            if background_tasks is not None:
+                background_tasks.add_task(self._cleanup_document_artifacts, doc_id, chunk_paths, chunk_ids)
+                logger.info(f"Deleted document {doc_id}; cleanup of {len(chunk_paths)} chunk files scheduled")
+            else:
+                await self._cleanup_document_artifacts(doc_id, chunk_paths, chunk_ids)
             
             return {
                 "doc_id": doc_id,
@@ -234,7 +226,85 @@ class DocumentService(BaseService):
             raise StorageError(f"Failed to delete document {doc_id}: {e}")
     
 
-    async def delete_chunk(self, chunk_id: str) -> Dict[str, Any]:
+    async def _cleanup_document_artifacts(
+        self,
+        doc_id: str,
+        chunk_paths: List[Path],
+        chunk_ids: List[str]
+    ) -> None:
+        """Best-effort concurrent deletion of the document file, chunk files and embeddings"""
+        _, num_chunk_files_deleted, _ = await asyncio.gather(
+            self._delete_document_file(doc_id),
+            self._delete_chunk_files(chunk_paths),
+            self._delete_embeddings(chunk_ids),
+        )
+        logger.info(f"Deleted document {doc_id} and {num_chunk_files_deleted} chunk files")
+    
+
+    async def _delete_document_file(self, doc_id: str) -> None:
+        """Best-effort deletion of the document PDF file"""
+        try:
+            await self.file_store.delete_file(doc_id)
+        except Exception as e:
+            logger.warning(
+                f"Deleting document file '{doc_id}' failed (database already deleted): {e}. "
+                "Clean up orphaned file later."
+            )
+    
+
+    async def _delete_chunk_files(self, chunk_paths: List[Path]) -> int:
+        """
+        Best-effort concurrent deletion of chunk files, off the event loop
+        (batched through io_uring when settings.io_backend is "uring").
+        
+        Missing files are ignored (no exists() probe). Returns the number of
+        paths processed without error.
+        """
+        results = await unlink_many([str(chunk_path) for chunk_path in chunk_paths])
+        num_deleted = 0
+        for chunk_path, result in zip(chunk_paths, results):
+            if result is not None:
+                logger.warning(
+                    f"Deleting chunk file '{chunk_path}' failed: {result}. "
+                    "Clean up orphaned file later."
+                )
+            else:
+                num_deleted += 1
+                logger.debug(f"Deleted chunk file: {chunk_path}")
+        return num_deleted
+    
+
+    async def _delete_embeddings(self, chunk_ids: List[str]) -> None:
+        """Best-effort deletion of chunk embeddings from all vector stores concurrently"""
+        if not chunk_ids:
+            return
+        
+        stores = [
+            (name, store) for name, store in (
+                ("SingleVectorStore", self.single_vector_store),
+                ("MultiVectorStore", self.multi_vector_store),
+            )
+            if store
+        ]
+        results = await asyncio.gather(
+            *(store.delete_many(chunk_ids) for _, store in stores),
+            return_exceptions=True
+        )
+        for (name, _), result in zip(stores, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    f"Deleting {len(chunk_ids)} embeddings from {name} failed: {result}. "
+                    "Clean up orphaned embeddings later."
+                )
+            else:
+                logger.debug(f"Deleted {len(chunk_ids)} embeddings from {name}")
+    
+
+    async def delete_chunk(
+        self,
+        chunk_id: str,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Dict[str, Any]:
         """
         Delete chunk and all associated data.
         
@@ -247,6 +317,8 @@ class DocumentService(BaseService):
 
         Args:
             chunk_id: The ID of the chunk to delete.
+            background_tasks: If given, best-effort cleanup is scheduled to run after
+                the response is sent instead of being awaited here.
         
         Returns:
             Dictionary with chunk ID and status
@@ -257,48 +329,16 @@ class DocumentService(BaseService):
                 raise StorageError(f"Chunk {chunk_id} not found")
             
             chunk_path = chunk_info.get("chunk_path")
+            chunk_paths = [Path(chunk_path)] if chunk_path else []
             
             # Delete chunk metadata from database first
             # If this fails, the entire operation should fail
             await self.document_sql_store.delete_chunk(chunk_id)
             
-            # Delete chunk file
-            # TODO: use a background cleanup job in production
-            if chunk_path:
-                chunk_file_path = Path(chunk_path)
-                if chunk_file_path.exists():
-                    try:
-                        chunk_file_path.unlink()
-                        logger.debug(f"Deleted chunk file: {chunk_file_path}")
-                    except Exception as e:
-                        logger.warning(
-                            f"Deleting chunk file '{chunk_file_path}' failed (database already deleted): {e}. "
-                            "Clean up orphaned file later."
-                        )
-
-            # Delete from single vector store (ChromaDB)
-            # TODO: use a background cleanup job in production
-            if self.single_vector_store:
-                try:
-                    await self.single_vector_store.delete(chunk_id)
-                    logger.debug(f"Deleted embedding from SingleVectorStore for chunk {chunk_id}")
-                except Exception as e:
-                    logger.warning(
-                        f"Deleting embedding from SingleVectorStore for chunk '{chunk_id}' failed: {e}. "
-                        "Clean up orphaned embedding later."
-                    )
-            
-            # Delete from multi vector store (mmap files)
-            # TODO: use a background cleanup job in production
-            if self.multi_vector_store:
-                try:
-                    await self.multi_vector_store.delete(chunk_id)
-                    logger.debug(f"Deleted embedding from MultiVectorStore for chunk {chunk_id}")
-                except Exception as e:
-                    logger.warning(
-                        f"Deleting embedding from MultiVectorStore for chunk '{chunk_id}' failed: {e}. "
-                        "Clean up orphaned embedding later."
-                    )
+            if background_tasks is not None:
+                background_tasks.add_task(self._cleanup_chunk_artifacts, chunk_id, chunk_paths)
+            else:
+                await self._cleanup_chunk_artifacts(chunk_id, chunk_paths)
             
             logger.info(f"Deleted chunk {chunk_id}")
             
@@ -314,6 +354,14 @@ class DocumentService(BaseService):
             raise StorageError(f"Failed to delete chunk {chunk_id}: {e}")
     
 
+    async def _cleanup_chunk_artifacts(self, chunk_id: str, chunk_paths: List[Path]) -> None:
+        """Best-effort concurrent deletion of a chunk's file and embeddings"""
+        await asyncio.gather(
+            self._delete_chunk_files(chunk_paths),
+            self._delete_embeddings([chunk_id]),
+        )
+    
+
     async def list_documents(self, filter: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         List documents with optional filter.
@@ -335,6 +383,24 @@ class DocumentService(BaseService):
             raise StorageError(f"Failed to list documents: {e}")
     
 
+    async def list_chunks(self, session: Optional[AsyncSession] = None) -> List[Dict[str, Any]]:
+        """
+        List all chunks of all documents.
+        
+        Args:
+            session: Optional request-scoped session to run the query on
+        
+        Returns:
+            List of chunk dictionaries, grouped by document
+        """
+        try:
+            return await self.document_sql_store.list_all_chunks(session=session)
+        except StorageError:
+            raise
+        except Exception as e:
+            logger.error(f"Error listing chunks: {e}")
+            raise StorageError(f"Failed to list chunks: {e}")
+    
     async def get_document(self, doc_id: str) -> Dict[str, Any]:
         """
         Get document with all its chunks.
@@ -353,4 +419,24 @@ class DocumentService(BaseService):
         except Exception as e:
             logger.error(f"Error getting document {doc_id}: {e}")
             raise StorageError(f"Failed to get document: {e}")
+    
+
+    async def get_document_json(self, doc_id: str) -> bytes:
+        """
+        Get document with all its chunks as serialized JSON (cached by the SQL store).
+        
+        Args:
+            doc_id: The ID of the document to get.
+        
+        Returns:
+            JSON-encoded document dictionary with metadata and chunks
+        """
+        try:
+            doc_json = await self.document_sql_store.get_document_with_chunks_json(doc_id)
+            if doc_json is None:
+                raise StorageError(f"Document {doc_id} not found")
+            return doc_json
+        except Exception as e:
+            logger.error(f"Error getting document {doc_id}: {e}")
+            raise StorageError(f"Failed to get document: {e}")
 
@@ -3,19 +3,30 @@ Embedding service - orchestrates embedding generation
 INTERNAL SERVICE: Called by IngestionService (chunk embeddings) and RetrievalService (query embeddings)
 """
 
+import asyncio
 import logging
 import base64
 from typing import List, Dict, Any, Optional
+
+import numpy as np
 from domain.rag.embedding.client import JinaEmbeddingClient
 from domain.rag.embedding.batch_processor import BatchProcessor
-from domain.rag.embedding.types import EmbeddingResult
+from domain.rag.embedding.types import EmbeddingResult, SingleVectorEmbedding, MultiVectorEmbedding
 from storage.base import BaseDocumentSQLStore, BaseSingleVectorStore, BaseMultiVectorStore
+from storage.embedding_cache import EmbeddingCache
 from services.base import BaseService
+from core.config import settings
 from core.exceptions import EmbeddingError
+from utils.file_io import read_many
 
 logger = logging.getLogger(__name__)
 
 
+def _b64encode(data: bytes) -> str:
+    """Base64-encode bytes to a UTF-8 string."""
+    return base64.b64encode(data).decode("utf-8")
+
+
 class EmbeddingService(BaseService):
     """
     Orchestrates embedding generation for both chunks and queries.
@@ -28,14 +39,14 @@ class EmbeddingService(BaseService):
     # Fields to exclude from vector store metadata
     # These are either: (1) passed separately (chunk_id), (2) too large (chunk_pdf, chunk_text),
     # (3) not useful for search/filtering (file paths), or (4) can become stale (status)
-    METADATA_EXCLUDED_FIELDS = {
+    METADATA_EXCLUDED_FIELDS = frozenset({
         'chunk_id',      # Passed as separate parameter to vector store
-        'chunk_pdf',     # Base64-encoded PDF data, too large for metadata
+        'chunk_pdf',     # PDF data (base64 or raw bytes), too large for metadata
         'chunk_text',    # Full text content, too large for metadata
         'doc_path',      # File system path, not useful for search/filtering
         'chunk_path',    # File system path, not useful for search/filtering
         'status',        # Document status can become stale (fetched before status update to "processed")
-    }
+    })
     
     def __init__(
         self,
@@ -44,12 +55,14 @@ class EmbeddingService(BaseService):
         multi_vector_store: Optional[BaseMultiVectorStore] = None,
         chunk_embedding_client: Optional[JinaEmbeddingClient] = None,
         query_embedding_client: Optional[JinaEmbeddingClient] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
     ):
         self.chunk_embedding_client = chunk_embedding_client or JinaEmbeddingClient(task="retrieval.passage")
         self.query_embedding_client = query_embedding_client or JinaEmbeddingClient(task="retrieval.query")
         self.document_sql_store = document_sql_store
         self.single_vector_store = single_vector_store
         self.multi_vector_store = multi_vector_store
+        self.embedding_cache = embedding_cache
     
 
     async def generate_chunk_embeddings(
@@ -84,15 +97,14 @@ class EmbeddingService(BaseService):
                     embedable["pdf"] = chunk_record["chunk_pdf"]
                 embedables.append(embedable)
 
-            logger.info(f"Calling Jina embedding API for {len(embedables)} embedables")
-            embedding_results = await self.chunk_embedding_client.embed(embedables)
+            embedding_results = await self._embed_chunks_cached(embedables)
             await self._store_embeddings(chunk_records, embedding_results)
             logger.info("Successfully stored embeddings in vector stores")
             return embedding_results
 
         except Exception as e:
             logger.error(f"Error in generate_chunk_embeddings: {e}")
-            raise EmbeddingError(f"Failed to generate chunk embeddings: {e}")
+            raise EmbeddingError(f"Failed to generate chunk embeddings: {e}") from e
 
     async def generate_query_embeddings(
         self, queries: List[str]
@@ -116,35 +128,110 @@ class EmbeddingService(BaseService):
             raise EmbeddingError(f"Failed to generate_query_embeddings: {e}")
     
 
+    async def _embed_chunks(self, embedables: List[Dict[str, Any]]) -> List[EmbeddingResult]:
+        """Call the Jina embedding API for chunk embedables"""
+        logger.info(f"Calling Jina embedding API for {len(embedables)} embedables")
+        if self.chunk_embedding_client.supports_binary:
+            return await self.chunk_embedding_client.embed_binary(embedables)
+        return await self.chunk_embedding_client.embed(embedables)
+
+
+    async def _embed_chunks_cached(self, embedables: List[Dict[str, Any]]) -> List[EmbeddingResult]:
+        """
+        Embed chunks, serving unchanged content from the embedding cache.
+        
+        Cache keys are sha256(content) + model id; only misses are sent to the API.
+        Cache failures are logged and fall back to embedding everything.
+        """
+        if not self.embedding_cache:
+            return await self._embed_chunks(embedables)
+
+        client = self.chunk_embedding_client
+        model_id = f"{client.model}__{client.task}" + ("__normalized" if client.normalized else "")
+        keys = [
+            EmbeddingCache.make_key(e["pdf"] if "pdf" in e else e.get("text", ""), model_id)
+            for e in embedables
+        ]
+
+        try:
+            cached = await self.embedding_cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed, embedding all chunks: {e}")
+            cached = {}
+
+        miss_indices = [i for i, key in enumerate(keys) if key not in cached]
+        logger.info(f"Embedding cache: {len(embedables) - len(miss_indices)} hits, {len(miss_indices)} misses")
+
+        miss_results = []
+        if miss_indices:
+            miss_results = await self._embed_chunks([embedables[i] for i in miss_indices])
+            try:
+                await self.embedding_cache.put_many(
+                    {
+                        keys[i]: (result.single_vector.embedding, result.multi_vectors.embeddings)
+                        for i, result in zip(miss_indices, miss_results)
+                    },
+                    model_id
+                )
+            except Exception as e:
+                logger.warning(f"Failed to write {len(miss_results)} embeddings to cache: {e}")
+
+        # Merge hits and misses preserving input order
+        results: List[Optional[EmbeddingResult]] = [None] * len(embedables)
+        for i, result in zip(miss_indices, miss_results):
+            results[i] = result
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                id = embedables[i]["id"]
+                single_vector, multi_vectors = cached[key]
+                results[i] = EmbeddingResult(
+                    id=id,
+                    single_vector=SingleVectorEmbedding(id=id, embedding=single_vector, model_embed=model_id),
+                    multi_vectors=MultiVectorEmbedding(
+                        id=id, embeddings=multi_vectors, model_embed=model_id, unit_norm=client.normalized
+                    ),
+                )
+        return results
+
+
     async def _build_chunk_records(self, chunk_inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Extract chunk records from chunk inputs"""
 
+        # Fetch chunk and document metadata for all PDF chunks in two queries
+        pdf_ids = [c.get("chunk_id") for c in chunk_inputs if c.get("chunk_source") == "pdf"]
+        chunk_metas = await self.document_sql_store.get_chunks_by_ids(pdf_ids)
+        doc_metas = await self.document_sql_store.get_documents_by_chunk_ids(pdf_ids)
+
         chunk_records = []
         for chunk_input in chunk_inputs:      
             id = chunk_input.get("chunk_id")
             chunk_record = chunk_input.copy()
 
             if chunk_input.get("chunk_source") == "pdf":
-                # Get metadata from document metadata store
-                doc_meta = await self.document_sql_store.get_document_by_chunk(id)
-                chunk_meta = await self.document_sql_store.get_chunk(id)
+                doc_meta = doc_metas.get(id)
+                chunk_meta = chunk_metas.get(id)
 
                 if not chunk_meta:
                     raise EmbeddingError(f"Chunk {id} not found in database")
                 if not doc_meta:
                     raise EmbeddingError(f"Document for chunk {id} not found in database")
 
-                with open(chunk_meta["chunk_path"], "rb") as f:
-                    pdf_bytes = f.read()
-                pdf_base64 = base64.b64encode(pdf_bytes).decode("utf-8")
-
                 chunk_record = {
                     **doc_meta,
                     **chunk_meta,
-                    "chunk_pdf": pdf_base64,
                 }
 
             chunk_records.append(chunk_record)
+
+        # Read (and base64-encode unless the client takes raw bytes) chunk PDFs concurrently off the event loop
+        pdf_records = [r for r in chunk_records if r.get("chunk_source") == "pdf"]
+        pdf_contents = await read_many(
+            [r["chunk_path"] for r in pdf_records],
+            transform=None if self.chunk_embedding_client.supports_binary else _b64encode
+        )
+        for chunk_record, pdf_content in zip(pdf_records, pdf_contents):
+            chunk_record["chunk_pdf"] = pdf_content
+
         return chunk_records
 
 
@@ -152,30 +239,37 @@ class EmbeddingService(BaseService):
         """Store embeddings in the stores"""
         logger.info(f"Storing embeddings for {len(chunk_records)} chunks in vector stores")
 
-        # Store single vectors
-        for i, result in enumerate(embedding_results):
-            chunk_id = chunk_records[i].get("chunk_id")
-            # Build metadata: exclude None values (ChromaDB requirement) and excluded fields
-            metadata = {
-                k: v for k, v in chunk_records[i].items() 
-                if k not in self.METADATA_EXCLUDED_FIELDS and v is not None
-            }
-            
-            await self.single_vector_store.add(
-                chunk_id=chunk_id,
-                embedding=result.single_vector.embedding,
-                metadata=metadata
-            )
-        logger.info(f"Stored {len(embedding_results)} single vectors in ChromaDB")
-        
-        # Store multi-vectors
-        for i, result in enumerate(embedding_results):
-            chunk_id = chunk_records[i].get("chunk_id")
-            await self.multi_vector_store.add(
-                chunk_id=chunk_id,
-                embeddings=result.multi_vectors.embeddings
-            )
-        logger.info(f"Stored {len(embedding_results)} multi-vectors in file store")
+        # Records in a batch share a schema: compute the metadata projection once
+        metadata_keys = [k for k in chunk_records[0] if k not in self.METADATA_EXCLUDED_FIELDS] if chunk_records else []
+
+        chunk_ids = [record.get("chunk_id") for record in chunk_records]
+        # Build metadata from the precomputed keys, excluding None values (ChromaDB requirement)
+        metadatas = [
+            {k: v for k in metadata_keys if (v := record.get(k)) is not None}
+            for record in chunk_records
+        ]
+
+        # Stack single vectors into one [N, D] float32 array (the store L2-normalizes on add)
+        single_vectors = np.stack(
+            [result.single_vector.embedding for result in embedding_results], axis=0
+        ).astype(np.float32)
+
+        # Multi-vector writes run concurrently, bounded so the store isn't overrun
+        semaphore = asyncio.Semaphore(settings.embedding_store_concurrency)
+
+        async def store_multi(chunk_id: str, result: EmbeddingResult):
+            async with semaphore:
+                await self.multi_vector_store.add(
+                    chunk_id=chunk_id,
+                    embeddings=result.multi_vectors.embeddings
+                )
+
+        # Single vectors go in one batched call, alongside the multi-vector writes
+        await asyncio.gather(
+            self.single_vector_store.add_batch(chunk_ids, single_vectors, metadatas),
+            *(store_multi(chunk_id, result) for chunk_id, result in zip(chunk_ids, embedding_results))
+        )
+        logger.info(f"Stored {len(embedding_results)} single vectors in ChromaDB and multi-vectors in file store")
 
 
     async def close(self):
@@ -2,8 +2,11 @@
 Evaluation service - orchestrates evaluation
 """
 
+import asyncio
 import logging
 from typing import List, Dict, Any
+
+import numpy as np
 from domain.evaluation.evaluator import Evaluator
 from domain.evaluation.ground_truth import GroundTruthManager
 from domain.evaluation.reporter import EvaluationReporter
@@ -46,8 +49,11 @@ class EvaluationService(BaseService):
             # Batch embed all queries at once
             query_embedding_results = await self.retrieval_service.embedding_service.generate_query_embeddings(queries)
             
-            # Extract all query vectors
-            query_vectors = [result.single_vector.embedding for result in query_embedding_results]
+            # Stack all query vectors into one contiguous [N, D] float32 array
+            query_vectors = np.ascontiguousarray(
+                np.stack([result.single_vector.embedding for result in query_embedding_results], axis=0),
+                dtype=np.float32
+            )
             
             # Batch retrieve for all queries at once
             all_candidates = await self.retrieval_service.ann_retriever.retrieve(
@@ -55,14 +61,16 @@ class EvaluationService(BaseService):
                 top_k=10  # Default top_k for evaluation
             )
             
-            # Build retrieved_dict from batch results
-            retrieved_dict = {}
-            for i, query in enumerate(queries):
-                candidates = all_candidates[i] if i < len(all_candidates) else []
-                retrieved_dict[query] = [r["chunk_id"] for r in candidates]
+            # Build retrieved_dict from batch results in one pass (missing results -> empty list)
+            retrieved_dict = dict.fromkeys(queries, [])
+            retrieved_dict.update(
+                (query, [r["chunk_id"] for r in candidates])
+                for query, candidates in zip(queries, all_candidates)
+            )
             
-            # Evaluate
-            evaluation_results = self.evaluator.evaluate_batch(
+            # Evaluate (CPU-bound) off the event loop
+            evaluation_results = await asyncio.to_thread(
+                self.evaluator.evaluate_batch,
                 queries=queries,
                 retrieved_dict=retrieved_dict,
                 k_values=k_values
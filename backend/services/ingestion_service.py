@@ -3,10 +3,14 @@ Ingestion service - orchestrates download + split + metadata + embedding
 INTERNAL SERVICE: Called by API endpoints
 """
 
+import asyncio
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
-from domain.rag.ingestion.splitter import PDFSplitter
+from typing import Dict, Any, List, Optional, Set, Tuple
+from domain.rag.ingestion.splitter import PDFSplitter, split_pdf_and_store_page_chunks
 from storage.base import BaseDocumentSQLStore
 from storage.base import BaseFileStore
 from storage.document_sql_store import DocumentStatus
@@ -18,6 +22,17 @@ from core.config import settings
 logger = logging.getLogger(__name__)
 
 
+def _payload_sizes(chunks: List[Dict[str, Any]]) -> List[int]:
+    """Chunk file sizes in bytes (0 when a chunk has no readable file)"""
+    sizes = []
+    for chunk in chunks:
+        try:
+            sizes.append(os.path.getsize(chunk["chunk_path"]))
+        except (KeyError, OSError):
+            sizes.append(0)
+    return sizes
+
+
 class IngestionService(BaseService):
     """Orchestrates document ingestion pipeline: split → store chunks → generate embeddings."""
     
@@ -31,6 +46,11 @@ class IngestionService(BaseService):
         self.document_sql_store = document_sql_store
         self.file_store = file_store
         self.embedding_service = embedding_service
+        # PDF splitting is CPU-bound: run it in worker processes so it neither blocks
+        # the event loop nor serializes concurrent ingests on the GIL / MuPDF lock.
+        # Created on first use, with spawn: forking a process that already runs
+        # executor threads and DB connections can deadlock the children
+        self._split_pool: Optional[ProcessPoolExecutor] = None
     
 
     async def ingest_unprocessed_documents(self) -> Dict[str, Any]:
@@ -49,34 +69,68 @@ class IngestionService(BaseService):
         }
 
         try:
-            unprocessed_documents = await self.document_sql_store.list_documents(
-                filter=[DocumentStatus.UPLOADED.value, DocumentStatus.ERROR.value]
-            )
-            logger.info(f"Found {len(unprocessed_documents)} unprocessed documents (status: uploaded or error)")
-            if not unprocessed_documents:
-                logger.info("No unprocessed documents found")
-                return result
-            
-            # For now, loop to process unprocessed documents
-            logger.info(f"Processing {len(unprocessed_documents)} documents...")
-            for doc in unprocessed_documents:
+            # Documents are independent: stream them from the store and ingest them
+            # concurrently, bounded by ingest_concurrency. Acquiring a slot before
+            # pulling the next document keeps only in-flight documents in memory.
+            semaphore = asyncio.Semaphore(settings.ingest_concurrency or 8)
+            pending = set()
+            num_found = 0
+            failed_doc_ids = []
+
+            # One directory scan instead of a stat() per document
+            stored_doc_ids = await asyncio.to_thread(self.file_store.list_doc_ids)
+
+            async def mark_failed() -> None:
+                # One UPDATE per group of failures, so failed documents leave PROCESSING during the run
+                doc_ids = failed_doc_ids.copy()
+                failed_doc_ids.clear()
+                try:
+                    await self.document_sql_store.bulk_update_status(doc_ids, DocumentStatus.ERROR.value)
+                except Exception as status_error:
+                    logger.error(f"Failed to mark documents as error, left in processing: {doc_ids} ({status_error})")
+
+            async def ingest_one(doc: Dict[str, Any]) -> None:
                 doc_id = doc["doc_id"]
-                logger.info(f"Processing document {doc_id} ({doc.get('doc_name', 'unknown')})")
-                
                 try:
-                    num_chunks = await self.ingest_document(doc_id)
+                    logger.info(f"Processing document {doc_id} ({doc.get('doc_name', 'unknown')})")
+                    num_chunks = await self.ingest_document(doc_id, stored_doc_ids=stored_doc_ids)
                     result["num_chunks_just_processed"] += num_chunks
                     result["num_documents_just_processed"] += 1
                 except Exception as e:
                     error_msg = str(e)
                     logger.error(f"Error processing document {doc_id}: {error_msg}", exc_info=True)
-                    await self._update_document_status(doc_id, DocumentStatus.ERROR.value)
+                    failed_doc_ids.append(doc_id)
+                    # Failed documents do not stop the others from being processed
                     result["num_documents_failed"] += 1
                     result["failed_documents"].append({
                         "doc_id": doc_id,
                         "error": error_msg
                     })
-                    # Do not re-raise here, allow other documents to be processed
+                    if len(failed_doc_ids) >= settings.ingest_error_flush_size:
+                        await mark_failed()
+                finally:
+                    semaphore.release()
+
+            try:
+                async for doc in self.document_sql_store.iter_documents(
+                    filter=[DocumentStatus.UPLOADED.value, DocumentStatus.ERROR.value]
+                ):
+                    await semaphore.acquire()
+                    num_found += 1
+                    task = asyncio.create_task(ingest_one(doc))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            finally:
+                # Let already started documents finish even if iteration fails
+                if pending:
+                    await asyncio.gather(*pending)
+                if failed_doc_ids:
+                    await mark_failed()
+
+            if num_found == 0:
+                logger.info("No unprocessed documents found")
+            else:
+                logger.info(f"Processed {num_found} unprocessed documents (status: uploaded or error)")
 
             return result
 
@@ -85,20 +139,32 @@ class IngestionService(BaseService):
             raise IngestionError(f"Failed to ingest documents: {e}")
     
 
-    async def ingest_document(self, doc_id: str) -> int:
-        """Process a single document: split → store → embed."""
+    async def ingest_document(self, doc_id: str, stored_doc_ids: Optional[Set[str]] = None) -> int:
+        """
+        Process a single document: split → store → embed.
+        
+        Args:
+            doc_id: Document to ingest
+            stored_doc_ids: Optional doc ids known to have a stored file (from FileStore.list_doc_ids);
+                           skips the per-document existence check for those
+        """
 
         if not self.document_sql_store:
             raise IngestionError("DocumentSQLStore is required for document ingestion")
         if not self.file_store:
             raise IngestionError("FileStore is required for document ingestion")
         
-        doc_name, pdf_path = await self._get_document_metadata(doc_id)
-        await self._update_document_status(doc_id, DocumentStatus.PROCESSING.value)
+        doc_name, pdf_path = await self._get_document_metadata(doc_id, stored_doc_ids)
         
         # Split PDF into chunks, store chunks, store metadata
-        chunks = self.splitter.split_pdf_and_store_page_chunks(
-            doc_id, str(pdf_path), doc_name
+        if self._split_pool is None:
+            self._split_pool = ProcessPoolExecutor(
+                max_workers=settings.split_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        chunks = await asyncio.get_running_loop().run_in_executor(
+            self._split_pool,
+            split_pdf_and_store_page_chunks,
+            self.splitter.chunk_dir, doc_id, str(pdf_path), doc_name
         )
         await self._upsert_chunks_to_document_sql_store(
             doc_id, chunks
@@ -115,32 +181,80 @@ class IngestionService(BaseService):
         return len(chunks)
  
 
-    async def _get_document_metadata(self, doc_id: str) -> Tuple[str, Path]:
-        """Get document metadata from the database and construct file path."""
-        doc = await self.document_sql_store.get_document(doc_id)
+    async def close(self):
+        """Shut down the PDF split worker processes"""
+        if self._split_pool is not None:
+            self._split_pool.shutdown(wait=False, cancel_futures=True)
+
+
+    async def _get_document_metadata(
+        self, doc_id: str, stored_doc_ids: Optional[Set[str]] = None
+    ) -> Tuple[str, Path]:
+        """Mark the document as processing, returning its name and file path."""
+        # Status change and metadata read in one statement
+        doc = await self.document_sql_store.set_status_and_get(doc_id, DocumentStatus.PROCESSING.value)
         if not doc:
             raise IngestionError(f"Document {doc_id} not found in database")
         
         doc_name = doc["doc_name"]
         pdf_path = self.file_store.get_file_path(doc_id)  # file_store is the source of truth
                 
-        if not pdf_path.exists():
+        # Files uploaded after the scan are not in stored_doc_ids: check those on disk
+        if not (stored_doc_ids and doc_id in stored_doc_ids) and not pdf_path.exists():
             await self._update_document_status(doc_id, DocumentStatus.ERROR.value)
             raise IngestionError(f"PDF file not found for {doc_id} at {pdf_path}")
         
         return doc_name, pdf_path
         
 
+    async def _batchify(
+        self,
+        chunks: List[Dict[str, Any]],
+        max_bytes: int = None,
+        max_items: int = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Partition chunks into embedding batches capped by total payload size and item count.
+        
+        Chunks are sorted by chunk file size (largest first) and packed greedily, so
+        large pages end up in small batches and many small pages share one batch.
+        A single chunk larger than max_bytes gets a batch of its own. File sizes are
+        read in one worker-thread call.
+        """
+        max_bytes = max_bytes or settings.embed_max_batch_bytes
+        max_items = max_items or settings.embed_max_batch
+
+        sizes = await asyncio.to_thread(_payload_sizes, chunks)
+
+        batches = []
+        batch, batch_bytes = [], 0
+        for size, chunk in sorted(zip(sizes, chunks), key=lambda x: x[0], reverse=True):
+            if batch and (batch_bytes + size > max_bytes or len(batch) >= max_items):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append(chunk)
+            batch_bytes += size
+        if batch:
+            batches.append(batch)
+        return batches
+
+
     async def _generate_and_store_chunk_embeddings(self, doc_id: str, chunks: List[Dict[str, Any]]) -> None:
-        """Generate embeddings for the chunks."""
+        """Generate embeddings for the chunks in size-capped batches, several batches at a time."""
+        semaphore = asyncio.Semaphore(settings.embed_batch_concurrency)
+
+        async def embed_batch(batch: List[Dict[str, Any]]) -> None:
+            chunk_inputs = [{
+                "chunk_id": chunk["chunk_id"],
+                "chunk_source": chunk["chunk_source"],
+            } for chunk in batch]
+            async with semaphore:
+                await self.embedding_service.generate_chunk_embeddings(chunk_inputs=chunk_inputs)
+
         try:
-            await self.embedding_service.generate_chunk_embeddings(
-                chunk_inputs=[{
-                    "chunk_id": chunk["chunk_id"],
-                    "chunk_source": chunk["chunk_source"],
-                } for chunk in chunks],
-            )
-            logger.info(f"Generated embeddings for {len(chunks)} chunks of document {doc_id}")
+            batches = await self._batchify(chunks)
+            await asyncio.gather(*(embed_batch(batch) for batch in batches))
+            logger.info(f"Generated embeddings for {len(chunks)} chunks of document {doc_id} in {len(batches)} batches")
         except Exception as e:
             logger.error(f"Failed to generate embeddings for document {doc_id}: {e}", exc_info=True)
             raise IngestionError(f"Embedding generation failed for document {doc_id}: {e}")
@@ -152,13 +266,5 @@ class IngestionService(BaseService):
     
 
     async def _upsert_chunks_to_document_sql_store(self, doc_id: str, chunks: List[Dict[str, Any]]) -> None:
-        """Store chunks in the document SQL store."""
-        for chunk in chunks:
-            await self.document_sql_store.upsert_chunk(
-                chunk_id=chunk["chunk_id"],
-                doc_id=doc_id,
-                chunk_path=chunk["chunk_path"],
-                chunk_name=chunk["chunk_name"],
-                chunk_source=chunk["chunk_source"],
-                chunk_level=chunk["chunk_level"]
-            )
+        """Store chunks in the document SQL store in one batched upsert."""
+        await self.document_sql_store.bulk_upsert_chunks(doc_id, chunks)
@@ -2,13 +2,19 @@
 Retrieval service - orchestrates retrieval: query embedding → ANN search → reranking
 """
 
+import asyncio
 import logging
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import fitz  # PyMuPDF
+import numpy as np
+from domain.rag.ingestion.splitter import PDF_TEXT_FLAGS
 from domain.rag.retrieval.ann_retriever import ANNRetriever
 from domain.rag.retrieval.reranker import Reranker
 from domain.rag.retrieval.types import RetrievalResult
+from domain.rag.embedding.types import EmbeddingResult
 from storage.single_vector_store import SingleVectorStore
 from storage.multi_vector_store import MultiVectorStore
 from storage.base import BaseDocumentSQLStore
@@ -17,9 +23,74 @@ from services.embedding_service import EmbeddingService
 from core.config import settings
 from core.exceptions import RetrievalError
 
+# Optional: pdfium text extraction - faster per page than PyMuPDF, but PDFium is not thread-safe
+try:
+    import pypdfium2 as pdfium
+    PYPDFIUM2_AVAILABLE = True
+except ImportError:
+    PYPDFIUM2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+TEXT_CACHE_SIZE = 1024  # Max extracted chunk texts kept in memory
+
+# pypdfium2 calls go through ctypes, which releases the GIL: without this lock, concurrent
+# worker threads would run PDFium concurrently (memory corruption / segfaults)
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _resolve_pdf_backend(backend: str) -> str:
+    """Pick the text extraction backend, falling back to PyMuPDF if pypdfium2 is unavailable."""
+    if backend == "pypdfium2" and not PYPDFIUM2_AVAILABLE:
+        logger.warning("pdf_text_backend='pypdfium2' but pypdfium2 is not installed; using PyMuPDF")
+        return "fitz"
+    if backend not in ("pypdfium2", "fitz"):
+        raise ValueError(f"Invalid pdf_text_backend: {backend}. Must be one of: pypdfium2, fitz")
+    return backend
+
+
+def _extract_first_page_fitz(path_str: str) -> str:
+    # Chunk PDFs are a single page: read the file in one call and parse from memory
+    with fitz.open(stream=Path(path_str).read_bytes(), filetype="pdf") as doc:
+        if len(doc) == 0:
+            return ""
+        return doc[0].get_text("text", flags=PDF_TEXT_FLAGS)
+
+
+def _extract_first_page_pdfium(path_str: str) -> str:
+    data = Path(path_str).read_bytes()
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            if len(pdf) == 0:
+                return ""
+            page = pdf[0]
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _cached_extract(path_str: str, mtime_ns: int, backend: str) -> str:
+    """Extract text from a single-page PDF chunk, memoized by path and modification time."""
+    # Page chunks are single-page PDFs: only the first page is read
+    if backend == "pypdfium2":
+        return _extract_first_page_pdfium(path_str)
+    return _extract_first_page_fitz(path_str)
+
+
+def _extract_text_sync(chunk_path: Path, backend: str) -> str:
+    """Extract text from a chunk PDF (blocking; run in a worker thread)."""
+    # mtime in the key: a re-ingested chunk file is re-parsed instead of served stale
+    return _cached_extract(str(chunk_path), chunk_path.stat().st_mtime_ns, backend)
+
+
 class RetrievalService(BaseService):
     """
     Orchestrates retrieval pipeline: embed query → ANN search → optionally rerank.
@@ -39,32 +110,73 @@ class RetrievalService(BaseService):
         self.reranker = Reranker(multi_vector_store)
         self.embedding_service = embedding_service
         self.document_sql_store = document_sql_store
+        self._pdf_backend = _resolve_pdf_backend(settings.pdf_text_backend)
+    
+    def clear_text_cache(self) -> None:
+        """Drop memoized chunk texts (e.g. after re-ingesting documents)."""
+        _cached_extract.cache_clear()
+    
     
     async def _extract_pdf_text(self, chunk_id: str) -> str:
         """Extract text from a PDF chunk file."""
+        texts = await self._extract_pdf_texts([chunk_id])
+        return texts.get(chunk_id, "")
+    
+    
+    async def _extract_pdf_texts(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """
+        Extract text from many PDF chunk files.
+        
+        Chunk metadata is looked up in one batched query. Text stored at ingestion
+        is returned directly; remaining files are parsed concurrently in worker threads.
+        
+        Returns:
+            Extracted text keyed by chunk_id ("" for chunks that could not be read)
+        """
+        if not chunk_ids:
+            return {}
+        if not self.document_sql_store:
+            logger.warning("document_sql_store not available, cannot extract PDF text")
+            return {}
+        
         try:
-            if not self.document_sql_store:
-                logger.warning("document_sql_store not available, cannot extract PDF text")
-                return ""
-            
-            chunk_meta = await self.document_sql_store.get_chunk(chunk_id)
-            if not chunk_meta or not chunk_meta.get("chunk_path"):
+            chunk_metas = await self.document_sql_store.get_chunks_by_ids(chunk_ids)
+        except Exception as e:
+            logger.error(f"Error getting chunk metadata for {len(chunk_ids)} chunks: {e}")
+            return {}
+        
+        # Text stored at ingestion is used as is; only older chunks without it are parsed
+        texts = {}
+        to_extract = []
+        for chunk_id in chunk_ids:
+            chunk_meta = chunk_metas.get(chunk_id) or {}
+            if chunk_meta.get("chunk_text") is not None:
+                texts[chunk_id] = chunk_meta["chunk_text"]
+            else:
+                to_extract.append((chunk_id, chunk_meta.get("chunk_path")))
+        
+        extracted = await asyncio.gather(*(
+            self._extract_pdf_text_from_path(chunk_id, chunk_path) for chunk_id, chunk_path in to_extract
+        ))
+        texts.update(zip((chunk_id for chunk_id, _ in to_extract), extracted))
+        return texts
+    
+    
+    async def _extract_pdf_text_from_path(self, chunk_id: str, chunk_path: Optional[str]) -> str:
+        """Extract text from a PDF chunk file whose path is already known."""
+        try:
+            if not chunk_path:
                 logger.warning(f"Chunk metadata not found for chunk_id: {chunk_id}")
                 return ""
             
-            chunk_path = Path(chunk_meta["chunk_path"])
+            chunk_path = Path(chunk_path)
             if not chunk_path.exists():
                 logger.warning(f"Chunk PDF file not found: {chunk_path}")
                 return ""
             
-            # Extract text from PDF using PyMuPDF (fitz)
-            with fitz.open(chunk_path) as doc:
-                if len(doc) == 0:
-                    return ""
-                # Get text from first page (page chunks are single-page PDFs)
-                page = doc[0]
-                return page.get_text()
-                
+            # Extract text from PDF off the event loop
+            return await asyncio.to_thread(_extract_text_sync, chunk_path, self._pdf_backend)
+            
         except Exception as e:
             logger.error(f"Error extracting text from PDF for chunk {chunk_id}: {e}")
             return ""
@@ -122,7 +234,10 @@ class RetrievalService(BaseService):
             
             # Embed all queries at once
             query_embedding_results = await self.embedding_service.generate_query_embeddings(queries)
-            query_vectors = [r.single_vector.embedding for r in query_embedding_results]
+            # One [M, D] float32 array so the store runs a single batched ANN search
+            query_vectors = np.asarray(
+                [r.single_vector.embedding for r in query_embedding_results], dtype=np.float32
+            )
             
             # Batch ANN search for all queries
             all_candidates = await self.ann_retriever.retrieve(
@@ -131,57 +246,154 @@ class RetrievalService(BaseService):
                 filter=filter
             )
             
-            # Process each query's results separately and return in order
-            results_by_query = []
+            # Fast path for the common single-query call: no per-query bookkeeping
+            if len(queries) == 1:
+                return [await self._retrieve_single(
+                    queries[0],
+                    query_embedding_results[0],
+                    query_vectors[0],
+                    all_candidates[0] if all_candidates else [],
+                    top_k_ann, top_k_rerank, use_reranking, force_pdf_to_text,
+                )]
+            
+            # Fetch candidate multi-vectors for all queries concurrently, up front,
+            # instead of one query at a time inside the rerank loop
+            preloaded_by_query = []
+            if use_reranking:
+                preloaded_by_query = await asyncio.gather(*(
+                    self.reranker.multi_vector_store.batch_get([c["chunk_id"] for c in candidates])
+                    for candidates in all_candidates
+                ))
+            
+            # Rank each query's candidates separately (None marks a query with no candidates)
+            final_results_by_query: List[Optional[List[Dict[str, Any]]]] = []
             
             for query_idx, query_embedding_result in enumerate(query_embedding_results):
                 candidates = all_candidates[query_idx] if query_idx < len(all_candidates) else []
                 
                 if not candidates:
-                    results_by_query.append([])
+                    final_results_by_query.append(None)
                     continue
                 
-                # Optionally rerank
-                if use_reranking:
-                    query_multi_vectors = query_embedding_result.multi_vectors.embeddings
-                    if not query_multi_vectors:
-                        query_multi_vectors = [query_vectors[query_idx]]
-                    
-                    reranked = await self.reranker.rerank(
-                        query_multi_vectors=query_multi_vectors,
-                        candidates=candidates
-                    )
-                    final_results = reranked[:top_k_rerank]
-                else:
-                    final_results = candidates[:top_k_ann]
-                
-                # Format results for this query
-                page_chunks = []
-                for result in final_results:
-                    chunk_id = result.get("chunk_id")
-                    metadata = result.get("metadata", {})
-                    chunk_name = metadata.get("chunk_name", "")
-                    chunk_text = metadata.get("chunk_text", "")
-                    chunk_score = result.get("score", 0.0)
-
-                    # Extract text for text-based LLMs that can't process PDFs directly
-                    if force_pdf_to_text and metadata.get("chunk_source") == "pdf":
-                        chunk_text = await self._extract_pdf_text(chunk_id)
-                    
-                    page_chunks.append({
-                        "chunk_id": chunk_id,
-                        "chunk_name": chunk_name,
-                        "score": chunk_score,
-                        "chunk_text": chunk_text
-                    })
-                
+                final_results_by_query.append(await self._rank_candidates(
+                    query_embedding_result,
+                    query_vectors[query_idx],
+                    candidates,
+                    preloaded_by_query[query_idx] if query_idx < len(preloaded_by_query) else None,
+                    top_k_ann, top_k_rerank, use_reranking,
+                ))
+            
+            # Extract text for text-based LLMs that can't process PDFs directly:
+            # one chunk metadata lookup for all queries, then concurrent extraction
+            pdf_texts = {}
+            if force_pdf_to_text:
+                pdf_chunk_ids = list(dict.fromkeys(
+                    chunk_id
+                    for final_results in final_results_by_query if final_results
+                    for chunk_id in self._pdf_chunk_ids(final_results)
+                ))
+                pdf_texts = await self._extract_pdf_texts(pdf_chunk_ids)
+            
+            # Format results per query and return in order
+            results_by_query = []
+            for query_idx, final_results in enumerate(final_results_by_query):
+                if final_results is None:
+                    results_by_query.append([])
+                    continue
                 results_by_query.append({
                     "query": queries[query_idx],
-                    "chunks": page_chunks
+                    "chunks": self._format_page_chunks(final_results, pdf_texts)
                 })
             
             return results_by_query
         except Exception as e:
             logger.error(f"Error in retrieve_chunks: {e}")
             raise RetrievalError(f"Page chunk search failed: {e}")
-
+    
+    
+    async def _retrieve_single(
+        self,
+        query: str,
+        query_embedding_result: EmbeddingResult,
+        query_vector: np.ndarray,
+        candidates: List[Dict[str, Any]],
+        top_k_ann: int,
+        top_k_rerank: int,
+        use_reranking: bool,
+        force_pdf_to_text: bool,
+    ) -> Union[Dict[str, Any], List[Any]]:
+        """Rank, extract and format the results of a single query (see retrieve_chunks)."""
+        if not candidates:
+            return []
+        
+        preloaded = None
+        if use_reranking:
+            preloaded = await self.reranker.multi_vector_store.batch_get([c["chunk_id"] for c in candidates])
+        
+        final_results = await self._rank_candidates(
+            query_embedding_result, query_vector, candidates, preloaded,
+            top_k_ann, top_k_rerank, use_reranking,
+        )
+        pdf_texts = await self._extract_pdf_texts(self._pdf_chunk_ids(final_results)) if force_pdf_to_text else {}
+        return {
+            "query": query,
+            "chunks": self._format_page_chunks(final_results, pdf_texts)
+        }
+    
+    
+    async def _rank_candidates(
+        self,
+        query_embedding_result: EmbeddingResult,
+        query_vector: np.ndarray,
+        candidates: List[Dict[str, Any]],
+        preloaded: Optional[Dict[str, np.ndarray]],
+        top_k_ann: int,
+        top_k_rerank: int,
+        use_reranking: bool,
+    ) -> List[Dict[str, Any]]:
+        """Optionally MaxSim-rerank one query's ANN candidates."""
+        if not use_reranking:
+            return candidates[:top_k_ann]
+        
+        query_multi_vectors = query_embedding_result.multi_vectors.embeddings
+        query_unit_norm = query_embedding_result.multi_vectors.unit_norm
+        if not query_multi_vectors:
+            query_multi_vectors = [query_vector]
+            query_unit_norm = False
+        
+        return await self.reranker.rerank(
+            query_multi_vectors=query_multi_vectors,
+            candidates=candidates,
+            top_n=top_k_rerank,
+            query_unit_norm=query_unit_norm,
+            preloaded=preloaded
+        )
+    
+    
+    @staticmethod
+    def _pdf_chunk_ids(final_results: List[Dict[str, Any]]) -> List[str]:
+        """Chunk ids of PDF results that have no text in their metadata."""
+        return [
+            result.get("chunk_id") for result in final_results
+            if result.get("metadata", {}).get("chunk_source") == "pdf"
+            and not result.get("metadata", {}).get("chunk_text")
+        ]
+    
+    
+    @staticmethod
+    def _format_page_chunks(
+        final_results: List[Dict[str, Any]],
+        pdf_texts: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        """Format ranked results as page chunks, using extracted text where available."""
+        page_chunks = []
+        for result in final_results:
+            chunk_id = result.get("chunk_id")
+            metadata = result.get("metadata", {})
+            page_chunks.append({
+                "chunk_id": chunk_id,
+                "chunk_name": metadata.get("chunk_name", ""),
+                "score": result.get("score", 0.0),
+                "chunk_text": pdf_texts[chunk_id] if chunk_id in pdf_texts else metadata.get("chunk_text", "")
+            })
+        return page_chunks
@@ -5,6 +5,8 @@ Vector storage layer
 from storage.base import BaseSingleVectorStore, BaseMultiVectorStore, BaseDocumentSQLStore, BaseFileStore
 from storage.document_sql_store import DocumentSQLStore
 from storage.file_store import FileStore
+from storage.embedding_cache import EmbeddingCache
+from storage.postgres_multi_vector_store import PostgresMultiVectorStore
 
 # Optional imports - only available if chromadb is installed
 try:
@@ -21,6 +23,8 @@ __all__ = [
     "BaseFileStore",
     "DocumentSQLStore",
     "FileStore",
+    "EmbeddingCache",
+    "PostgresMultiVectorStore",
     "SingleVectorStore",  # May be None if chromadb not installed
     "MultiVectorStore",   # May be None if chromadb not installed
 ]
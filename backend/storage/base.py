@@ -2,10 +2,18 @@
 Abstract base classes for storage
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, Union
 from pathlib import Path
+import numpy as np
 from core.exceptions import StorageError
+from utils.concurrency import io_limiter
+
+# Embedding types: contiguous float32 arrays are preferred (no per-element Python floats);
+# lists are still accepted and converted by the stores with np.asarray(x, dtype=np.float32)
+Vector = Union[np.ndarray, List[float]]            # [D]
+Vectors = Union[np.ndarray, List[List[float]]]     # [N, D]
 
 
 class BaseSingleVectorStore(ABC):
@@ -15,24 +23,41 @@ class BaseSingleVectorStore(ABC):
     async def add(
         self,
         chunk_id: str,
-        embedding: List[float],
+        embedding: Vector,
         metadata: Optional[Dict[str, Any]] = None
     ) -> None:
         """Add a vector to the store"""
         pass
     
+    async def add_batch(
+        self,
+        chunk_ids: List[str],
+        embeddings: Vectors,
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Add multiple vectors to the store.
+        
+        Default implementation runs per-id adds concurrently (bounded by io_limiter);
+        backends should override with a single batched call where possible.
+        """
+        metadatas = metadatas or [None] * len(chunk_ids)
+        await asyncio.gather(
+            *(io_limiter.run(self.add(cid, emb, meta)) for cid, emb, meta in zip(chunk_ids, embeddings, metadatas))
+        )
+    
     @abstractmethod
     async def query(
         self,
-        query_vector: List[float],
+        query_vectors: Vectors,
         top_k: int = 10,
         filter: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[List[Dict[str, Any]]]:
         """
-        Query the store.
+        Query the store with one or more query vectors ([N, D] float32 array or list).
         
         Returns:
-            List of results with 'chunk_id', 'score', 'metadata'
+            One list of results per query vector, each with 'chunk_id', 'score', 'metadata'
         """
         pass
     
@@ -41,15 +66,47 @@ class BaseSingleVectorStore(ABC):
         """Delete a vector from the store"""
         pass
     
+    async def delete_many(self, chunk_ids: List[str]) -> None:
+        """
+        Delete multiple vectors from the store.
+        
+        Default implementation runs per-id deletes concurrently (bounded by io_limiter);
+        backends should override with a single batched call where possible.
+        """
+        results = await asyncio.gather(
+            *(io_limiter.run(self.delete(chunk_id)) for chunk_id in chunk_ids), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise StorageError(f"Failed to delete {len(errors)}/{len(chunk_ids)} vectors: {errors[0]}")
+    
     @abstractmethod
     async def update(
         self,
         chunk_id: str,
-        embedding: Optional[List[float]] = None,
+        embedding: Optional[Vector] = None,
         metadata: Optional[Dict[str, Any]] = None
     ) -> None:
         """Update a vector in the store"""
         pass
+    
+    async def update_batch(
+        self,
+        chunk_ids: List[str],
+        embeddings: Optional[Vectors] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Update multiple vectors in the store.
+        
+        Default implementation runs per-id updates concurrently (bounded by io_limiter);
+        backends should override with a single batched call where possible.
+        """
+        embeddings = embeddings if embeddings is not None else [None] * len(chunk_ids)
+        metadatas = metadatas or [None] * len(chunk_ids)
+        await asyncio.gather(
+            *(io_limiter.run(self.update(cid, emb, meta)) for cid, emb, meta in zip(chunk_ids, embeddings, metadatas))
+        )
 
 
 class BaseMultiVectorStore(ABC):
@@ -59,28 +116,46 @@ class BaseMultiVectorStore(ABC):
     async def add(
         self,
         chunk_id: str,
-        embeddings: List[List[float]]
+        embeddings: Vectors
     ) -> None:
         """Add multi-vectors to the store"""
         pass
     
     @abstractmethod
-    async def get(self, chunk_id: str) -> Optional[List[List[float]]]:
-        """Get multi-vectors for a chunk"""
+    async def get(self, chunk_id: str) -> Optional[np.ndarray]:
+        """Get multi-vectors for a chunk as an [N, d] array"""
         pass
     
     @abstractmethod
     async def batch_get(
         self,
         chunk_ids: List[str]
-    ) -> Dict[str, List[List[float]]]:
-        """Get multi-vectors for multiple chunks"""
+    ) -> Dict[str, np.ndarray]:
+        """Get multi-vectors for multiple chunks as [N, d] arrays"""
         pass
     
     @abstractmethod
     async def delete(self, chunk_id: str) -> None:
         """Delete multi-vectors from the store"""
         pass
+    
+    async def delete_many(self, chunk_ids: List[str]) -> None:
+        """
+        Delete multi-vectors for multiple chunks.
+        
+        Default implementation runs per-id deletes concurrently (bounded by io_limiter);
+        backends should override with a single batched call where possible.
+        """
+        results = await asyncio.gather(
+            *(io_limiter.run(self.delete(chunk_id)) for chunk_id in chunk_ids), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise StorageError(f"Failed to delete {len(errors)}/{len(chunk_ids)} multi-vectors: {errors[0]}")
+    
+    async def flush(self) -> None:
+        """Persist buffered writes (called at shutdown); no-op for stores that write through"""
+        pass
 
 
 class BaseDocumentSQLStore(ABC):
@@ -110,41 +185,86 @@ class BaseDocumentSQLStore(ABC):
         chunk_path: str = None,
         chunk_name: str = None,
         chunk_source: str = None,
-        chunk_level: str = None
+        chunk_level: str = None,
+        chunk_text: str = None
     ) -> None:
         """Upsert chunk metadata"""
         pass
     
+    @abstractmethod
+    async def bulk_upsert_chunks(self, doc_id: str, chunks: List[Dict[str, Any]]) -> None:
+        """Upsert metadata for many chunks of a document in one transaction"""
+        pass
+    
     @abstractmethod
     async def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get document metadata"""
         pass
     
+    @abstractmethod
+    async def get_documents_by_ids(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get document metadata for multiple documents, keyed by doc_id"""
+        pass
+    
     @abstractmethod
     async def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
         """Get chunk metadata"""
         pass
     
+    @abstractmethod
+    async def get_chunks_by_ids(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get chunk metadata for multiple chunks, keyed by chunk_id"""
+        pass
+    
     @abstractmethod
     async def get_chunks_by_document(self, doc_id: str) -> List[Dict[str, Any]]:
         """Get all chunks for a document"""
         pass
     
+    @abstractmethod
+    async def list_all_chunks(self) -> List[Dict[str, Any]]:
+        """Get all chunks of all documents in one query"""
+        pass
+    
     @abstractmethod
     async def get_document_by_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
         """Get document that contains a specific chunk"""
         pass
     
+    @abstractmethod
+    async def get_documents_by_chunk_ids(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the containing document for multiple chunks, keyed by chunk_id"""
+        pass
+    
     @abstractmethod
     async def delete_document(self, doc_id: str) -> None:
         """Delete document and all its chunks"""
         pass
     
+    @abstractmethod
+    async def delete_document_returning_chunks(self, doc_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Delete document and all its chunks, returning the deleted chunks (None if not found)"""
+        pass
+    
     @abstractmethod
     async def list_documents(self, filter: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """List documents with optional status filter."""
         pass
     
+    async def iter_documents(
+        self,
+        filter: Optional[List[str]] = None,
+        batch_size: int = 256
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate documents with optional status filter, page by page.
+        
+        Default implementation yields from list_documents; stores should override
+        with paginated queries so the full list is never materialized.
+        """
+        for doc in await self.list_documents(filter=filter):
+            yield doc
+    
     @abstractmethod
     async def get_document_with_chunks(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get document with all its chunks"""
@@ -155,6 +275,21 @@ class BaseDocumentSQLStore(ABC):
         """Update document status"""
         pass
     
+    @abstractmethod
+    async def set_status_and_get(self, doc_id: str, status: str) -> Optional[Dict[str, Any]]:
+        """Update document status and return the updated document in one round trip (None if not found)"""
+        pass
+    
+    @abstractmethod
+    async def bulk_update_status(self, doc_ids: List[str], status: str) -> None:
+        """Set the same status on many documents in one statement"""
+        pass
+    
+    @abstractmethod
+    async def update_doc_paths(self, doc_paths: Dict[str, str]) -> None:
+        """Set doc_path per document (doc_id -> path) in one statement"""
+        pass
+    
     @abstractmethod
     async def delete_chunk(self, chunk_id: str) -> None:
         """Delete chunk metadata"""
@@ -169,6 +304,11 @@ class BaseFileStore(ABC):
         """Save PDF file"""
         pass
     
+    @abstractmethod
+    async def save_file_stream(self, doc_id: str, file_stream: AsyncIterator[bytes]) -> Path:
+        """Save PDF file from a stream of byte chunks"""
+        pass
+    
     @abstractmethod
     async def get_file(self, doc_id: str) -> Optional[bytes]:
         """Get PDF file content"""
@@ -188,4 +328,8 @@ class BaseFileStore(ABC):
     def get_file_path(self, doc_id: str) -> Path:
         """Get file path for a document ID"""
         pass
-
+    
+    @abstractmethod
+    def list_doc_ids(self) -> Set[str]:
+        """Get doc ids of all stored files"""
+        pass
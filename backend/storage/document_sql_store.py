@@ -2,11 +2,16 @@
 Document SQL store using PostgreSQL
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine, Column, String, ForeignKey, Integer, DateTime, Enum
-from sqlalchemy.orm import DeclarativeBase, sessionmaker, relationship
-from datetime import datetime
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Iterable
+from cachetools import TTLCache
+from sqlalchemy import select, delete, update, text, func, and_, or_, any_, bindparam, Column, String, Text, ForeignKey, Integer, DateTime, Enum, Index
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, relationship, selectinload
+from datetime import datetime, timezone
 import enum
 from storage.base import BaseDocumentSQLStore
 from core.config import settings
@@ -15,6 +20,11 @@ from core.exceptions import StorageError
 logger = logging.getLogger(__name__)
 
 
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime (the DateTime columns are timezone-naive)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -39,7 +49,7 @@ class DocumentModel(Base):
     __tablename__ = "documents"
     
     doc_id = Column(String, primary_key=True)
-    upload_date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    upload_date = Column(DateTime, nullable=False, default=_utcnow)
     status = Column(
         Enum(DocumentStatus, name="document_status"),
         nullable=False,
@@ -54,6 +64,11 @@ class DocumentModel(Base):
     
     chunks = relationship("ChunkModel", back_populates="document", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Status-filtered listing and iter_documents' keyset order (upload_date, doc_id)
+        Index("ix_documents_status_upload_date", "status", "upload_date", "doc_id"),
+    )
+    
 
 class ChunkModel(Base):
     __tablename__ = "chunks"
@@ -72,8 +87,161 @@ class ChunkModel(Base):
         nullable=False,
         default=ChunkLevel.PAGE
     )
+    chunk_text = Column(Text, nullable=True)  # Page text extracted at ingestion (None for chunks ingested before)
 
     document = relationship("DocumentModel", back_populates="chunks")
+    
+    __table_args__ = (
+        Index("ix_chunks_doc_id", "doc_id"),  # Chunks by document, cascade deletes, list_documents counts
+    )
+
+
+def _parse_chunk_enums(chunk_source: Optional[str], chunk_level: Optional[str]) -> tuple:
+    """Validate chunk_source/chunk_level strings and convert them to enums (defaults: PDF, PAGE)"""
+    try:
+        chunk_source_enum = ChunkSource.PDF if chunk_source is None else ChunkSource(chunk_source)
+    except ValueError:
+        raise ValueError(f"Invalid chunk_source: {chunk_source}. Must be one of: {[e.value for e in ChunkSource]}")
+    
+    try:
+        chunk_level_enum = ChunkLevel.PAGE if chunk_level is None else ChunkLevel(chunk_level)
+    except ValueError:
+        raise ValueError(f"Invalid chunk_level: {chunk_level}. Must be one of: {[e.value for e in ChunkLevel]}")
+    
+    return chunk_source_enum, chunk_level_enum
+
+
+def _build_chunk_upsert():
+    """INSERT ... ON CONFLICT (chunk_id) DO UPDATE for every non-key chunk column"""
+    stmt = pg_insert(ChunkModel)
+    return stmt.on_conflict_do_update(
+        index_elements=[ChunkModel.chunk_id],
+        set_={
+            "doc_id": stmt.excluded.doc_id,
+            "chunk_path": stmt.excluded.chunk_path,
+            "chunk_name": stmt.excluded.chunk_name,
+            "chunk_source": stmt.excluded.chunk_source,
+            "chunk_level": stmt.excluded.chunk_level,
+            "chunk_text": stmt.excluded.chunk_text,
+        }
+    )
+
+
+# Shared by upsert_chunk and bulk_upsert_chunks; row dicts are passed as parameter sets
+_UPSERT_CHUNKS = _build_chunk_upsert()
+
+# Core (not ORM) UPDATE, so update_doc_paths can executemany without per-row rowcount checks
+_UPDATE_DOC_PATH = (
+    update(DocumentModel.__table__)
+    .where(DocumentModel.__table__.c.doc_id == bindparam("b_doc_id"))
+    .values(doc_path=bindparam("b_doc_path"))
+)
+_UPDATE_STATUSES = (
+    update(DocumentModel.__table__)
+    .where(DocumentModel.__table__.c.doc_id == any_(bindparam("doc_ids", type_=ARRAY(String))))
+    .values(status=bindparam("status"))
+)
+
+# Plain columns for list endpoints: rows carry primitives, no DocumentModel instances are built
+_DOCUMENT_COLUMNS = (
+    DocumentModel.doc_id,
+    DocumentModel.doc_name,
+    DocumentModel.doc_size,
+    DocumentModel.upload_date,
+    DocumentModel.status,
+    DocumentModel.doc_authors,
+    DocumentModel.doc_abstract,
+    DocumentModel.doc_path,
+    DocumentModel.doc_published,
+)
+
+
+def _document_to_dict(doc) -> Dict[str, Any]:
+    """Document metadata dict from a DocumentModel or a row selected with _DOCUMENT_COLUMNS"""
+    return {
+        "doc_id": doc.doc_id,
+        "doc_name": doc.doc_name,
+        "doc_size": doc.doc_size,
+        "upload_date": doc.upload_date.isoformat() if doc.upload_date else None,
+        "status": doc.status.value,  # Enum columns always load as the Python enum
+        "doc_authors": doc.doc_authors,
+        "doc_abstract": doc.doc_abstract,
+        "doc_path": doc.doc_path,
+        "doc_published": doc.doc_published.isoformat() if doc.doc_published else None,
+    }
+
+
+def _chunk_to_dict(chunk, with_text: bool = False) -> Dict[str, Any]:
+    result = {
+        "chunk_id": chunk.chunk_id,
+        "doc_id": chunk.doc_id,
+        "chunk_name": chunk.chunk_name,
+        "chunk_path": chunk.chunk_path,
+        "chunk_source": chunk.chunk_source.value,
+        "chunk_level": chunk.chunk_level.value,
+    }
+    if with_text:
+        result["chunk_text"] = chunk.chunk_text
+    return result
+
+
+# Hot read queries built once with bound parameters, so every call reuses the same
+# compiled-cache entry and asyncpg prepared statement
+# Id lists bind as one array parameter (= ANY(:ids)) rather than an expanding IN, so the SQL
+# text, and with it the prepared statement, is the same for every list length.
+_Q_DOC_BY_ID = select(DocumentModel).where(DocumentModel.doc_id == bindparam("doc_id"))
+_Q_DOCS_BY_IDS = select(DocumentModel).where(DocumentModel.doc_id == any_(bindparam("doc_ids", type_=ARRAY(String))))
+_Q_CHUNKS_BY_IDS = select(ChunkModel).where(ChunkModel.chunk_id == any_(bindparam("chunk_ids", type_=ARRAY(String))))
+_Q_CHUNKS_BY_DOC = select(ChunkModel).where(ChunkModel.doc_id == bindparam("doc_id"))
+_Q_ALL_CHUNKS = select(ChunkModel).order_by(ChunkModel.doc_id)
+_Q_DOCS_BY_CHUNK_IDS = (
+    select(ChunkModel.chunk_id, DocumentModel)
+    .join(DocumentModel, ChunkModel.doc_id == DocumentModel.doc_id)
+    .where(ChunkModel.chunk_id == any_(bindparam("chunk_ids", type_=ARRAY(String))))
+)
+# Same shape as get_document_with_chunks, assembled by Postgres in one round trip.
+# Enum columns store the member names; every value here is the lowercased name.
+_Q_DOC_WITH_CHUNKS_JSON = text("""
+    SELECT jsonb_build_object(
+        'doc_id', d.doc_id,
+        'doc_name', d.doc_name,
+        'doc_size', d.doc_size,
+        'upload_date', d.upload_date,
+        'status', lower(d.status::text),
+        'doc_authors', d.doc_authors,
+        'doc_abstract', d.doc_abstract,
+        'doc_path', d.doc_path,
+        'doc_published', d.doc_published,
+        'chunks', COALESCE(
+            jsonb_agg(jsonb_build_object(
+                'chunk_id', c.chunk_id,
+                'chunk_name', c.chunk_name,
+                'chunk_path', c.chunk_path,
+                'chunk_source', lower(c.chunk_source::text),
+                'chunk_level', lower(c.chunk_level::text)
+            )) FILTER (WHERE c.chunk_id IS NOT NULL),
+            '[]'::jsonb
+        )
+    )::text
+    FROM documents d
+    LEFT JOIN chunks c ON c.doc_id = d.doc_id
+    WHERE d.doc_id = :doc_id
+    GROUP BY d.doc_id
+""")
+_Q_DOC_WITH_CHUNKS = (
+    select(DocumentModel)
+    .options(selectinload(DocumentModel.chunks))
+    .where(DocumentModel.doc_id == bindparam("doc_id"))
+)
+
+
+def _to_asyncpg_url(db_url: str) -> str:
+    """Point a postgres:// / postgresql:// connection string at the asyncpg driver"""
+    scheme, sep, rest = db_url.partition("://")
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        scheme = "postgresql+asyncpg"
+    # asyncpg takes 'ssl' instead of libpq's 'sslmode'
+    return f"{scheme}{sep}{rest}".replace("sslmode=", "ssl=")
 
 
 class DocumentSQLStore(BaseDocumentSQLStore):
@@ -83,21 +251,66 @@ class DocumentSQLStore(BaseDocumentSQLStore):
         db_url = self._get_db_url()
         logger.info(f"Connecting to PostgreSQL database")
 
-        self.engine = create_engine(
+        # asyncpg driver: queries yield to the event loop instead of blocking it
+        self.engine = create_async_engine(
             db_url,
             pool_pre_ping=True,  # Verify connections before using
-            pool_size=5,         # Connection pool size
-            max_overflow=10      # Max connections beyond pool_size
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            query_cache_size=settings.db_query_cache_size,
+            connect_args={
+                # asyncpg's own statement cache, and SQLAlchemy's prepared-statement cache on top of it
+                "statement_cache_size": settings.db_statement_cache_size,
+                "prepared_statement_cache_size": settings.db_statement_cache_size,
+                # JIT compilation costs more than it saves on these short OLTP queries
+                # (and on asyncpg's type-introspection query for each new connection)
+                "server_settings": {"jit": "off", "application_name": "rag-backend"},
+            }
         )
-
-        # Create tables if they don't exist
-        Base.metadata.create_all(self.engine)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.SessionLocal = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        
+        # Read-through caches for the per-id getters, invalidated by every write below
+        self._doc_cache = TTLCache(maxsize=settings.metadata_cache_size, ttl=settings.metadata_cache_ttl)
+        self._chunk_cache = TTLCache(maxsize=4 * settings.metadata_cache_size, ttl=settings.metadata_cache_ttl)
+        # Serialized get_document_with_chunks results, keyed by doc_id (any write to the document or its chunks evicts)
+        self._doc_json_cache = TTLCache(maxsize=settings.metadata_cache_size, ttl=settings.metadata_cache_ttl)
+        self._cache_generation = 0
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+    
+    async def init(self) -> None:
+        """Create tables if they don't exist and pre-warm the connection pool (call once at startup)"""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await self._add_missing_columns(conn)
+        await self._prewarm_pool(settings.db_pool_prewarm)
+    
+    async def _prewarm_pool(self, num_connections: int) -> None:
+        """Open connections concurrently and return them to the pool, so they are ready for requests"""
+        num_connections = min(num_connections, settings.db_pool_size)
+        if num_connections <= 0:
+            return
+        conns = await asyncio.gather(*(self.engine.connect() for _ in range(num_connections)))
+        await asyncio.gather(*(conn.close() for conn in conns))
+    
+    async def close(self) -> None:
+        """Dispose of the connection pool"""
+        await self.engine.dispose()
+    
+    async def _add_missing_columns(self, conn) -> None:
+        """Add columns and indexes introduced after a table was first created (create_all does not alter tables)"""
+        await conn.execute(text("ALTER TABLE chunks ADD COLUMN IF NOT EXISTS chunk_text TEXT"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chunks_doc_id ON chunks (doc_id)"))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_documents_status_upload_date "
+            "ON documents (status, upload_date, doc_id)"
+        ))
     
     def _get_db_url(self) -> str:
         # Prioritize postgres_db_url for managed services like Render
         if settings.postgres_db_url:
-            return settings.postgres_db_url
+            return _to_asyncpg_url(settings.postgres_db_url)
         
         # Build URL from individual parameters
         if not settings.postgres_password:
@@ -106,10 +319,88 @@ class DocumentSQLStore(BaseDocumentSQLStore):
                 "or POSTGRES_DB_URL connection string."
             )
         return (
-            f"postgresql://{settings.postgres_user}:{settings.postgres_password}"
+            f"postgresql+asyncpg://{settings.postgres_user}:{settings.postgres_password}"
             f"@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_database}"
         )
 
+    # ------------------------
+    # Metadata cache
+    # ------------------------
+    
+    async def _cached(
+        self,
+        cache: TTLCache,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read-through lookup; concurrent misses for the same key share one load.
+        
+        Returns a shallow copy so callers cannot mutate the cached entry.
+        """
+        value = cache.get(key)
+        if value is None:
+            inflight_key = (id(cache), key)
+            task = self._inflight.get(inflight_key)
+            if task is None:
+                task = asyncio.ensure_future(self._load_into(cache, key, loader))
+                self._inflight[inflight_key] = task
+                task.add_done_callback(
+                    lambda t: self._inflight.pop(inflight_key) if self._inflight.get(inflight_key) is t else None
+                )
+            # Shielded so one cancelled caller does not cancel the load for the others
+            value = await asyncio.shield(task)
+        return dict(value) if value is not None else None
+    
+    async def _load_into(
+        self,
+        cache: TTLCache,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        generation = self._cache_generation
+        value = await loader()
+        # A write that landed while loading may have made this value stale: return it, don't cache it
+        if value is not None and generation == self._cache_generation:
+            cache[key] = value
+        return value
+    
+    def _invalidate(
+        self,
+        doc_ids: Iterable[str] = (),
+        chunk_ids: Iterable[str] = (),
+        chunk_doc_ids: Iterable[str] = ()
+    ) -> None:
+        """Evict written documents/chunks; chunk_doc_ids are documents whose chunk list changed"""
+        self._cache_generation += 1
+        for doc_id in doc_ids:
+            self._doc_cache.pop(doc_id, None)
+            self._doc_json_cache.pop(doc_id, None)
+        for doc_id in chunk_doc_ids:
+            self._doc_json_cache.pop(doc_id, None)
+        for chunk_id in chunk_ids:
+            self._chunk_cache.pop(chunk_id, None)
+    
+    def _invalidate_document_chunks(self, doc_id: str) -> None:
+        self._invalidate(chunk_ids=[
+            chunk_id for chunk_id, chunk in list(self._chunk_cache.items()) if chunk["doc_id"] == doc_id
+        ])
+    
+    @asynccontextmanager
+    async def _read_session(self, session: Optional[AsyncSession]) -> AsyncIterator[AsyncSession]:
+        """
+        Use the caller's session if given (e.g. one per HTTP request), else a short transaction.
+        
+        Read methods accept a session so several calls in one request share a pooled
+        connection and one BEGIN/COMMIT; writes always use their own transaction so the
+        metadata caches are invalidated only after commit.
+        """
+        if session is not None:
+            yield session
+        else:
+            async with self.SessionLocal.begin() as own_session:
+                yield own_session
+    
     async def upsert_document(
         self,
         doc_id: str,
@@ -126,19 +417,26 @@ class DocumentSQLStore(BaseDocumentSQLStore):
             if status not in ["uploaded", "processing", "processed", "error"]:
                 raise ValueError(f"Invalid status: {status}. Must be one of: uploaded, processing, processed, error")
             
-            with self.SessionLocal.begin() as session:
-                doc = DocumentModel(
-                    doc_id=doc_id,
-                    doc_name=doc_name,
-                    doc_size=doc_size,
-                    upload_date=upload_date or datetime.utcnow(),
-                    status=DocumentStatus(status),
-                    doc_authors=doc_authors,
-                    doc_abstract=doc_abstract,
-                    doc_path=doc_path,
-                    doc_published=doc_published
-                )
-                session.merge(doc)  
+            values = {
+                "doc_id": doc_id,
+                "doc_name": doc_name,
+                "doc_size": doc_size,
+                "upload_date": upload_date or _utcnow(),
+                "status": DocumentStatus(status),
+                "doc_authors": doc_authors,
+                "doc_abstract": doc_abstract,
+                "doc_path": doc_path,
+                "doc_published": doc_published,
+            }
+            # Single INSERT ... ON CONFLICT round trip (merge() would SELECT first)
+            stmt = pg_insert(DocumentModel).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[DocumentModel.doc_id],
+                set_={k: stmt.excluded[k] for k in values if k != "doc_id"}
+            )
+            async with self.SessionLocal.begin() as session:
+                await session.execute(stmt)
+            self._invalidate(doc_ids=[doc_id])
         except Exception as e:
             logger.error(f"Error adding document {doc_id}: {e}")
             raise StorageError(f"Failed to add document: {e}")
@@ -150,126 +448,217 @@ class DocumentSQLStore(BaseDocumentSQLStore):
         chunk_path: str,
         chunk_name: str,
         chunk_source: str = None,
-        chunk_level: str = None
+        chunk_level: str = None,
+        chunk_text: str = None
     ) -> None:
         try:
-            try:
-                chunk_source_enum = ChunkSource.PDF if chunk_source is None else ChunkSource(chunk_source)
-            except ValueError:
-                raise ValueError(f"Invalid chunk_source: {chunk_source}. Must be one of: {[e.value for e in ChunkSource]}")
+            chunk_source_enum, chunk_level_enum = _parse_chunk_enums(chunk_source, chunk_level)
             
-            try:
-                chunk_level_enum = ChunkLevel.PAGE if chunk_level is None else ChunkLevel(chunk_level)
-            except ValueError:
-                raise ValueError(f"Invalid chunk_level: {chunk_level}. Must be one of: {[e.value for e in ChunkLevel]}")
-            
-            with self.SessionLocal.begin() as session:
-                chunk = ChunkModel(
-                    chunk_id=chunk_id,
-                    doc_id=doc_id,
-                    chunk_path=chunk_path,
-                    chunk_name=chunk_name,
-                    chunk_source=chunk_source_enum,
-                    chunk_level=chunk_level_enum
-                )
-                session.merge(chunk)
+            row = {
+                "chunk_id": chunk_id,
+                "doc_id": doc_id,
+                "chunk_path": chunk_path,
+                "chunk_name": chunk_name,
+                "chunk_source": chunk_source_enum,
+                "chunk_level": chunk_level_enum,
+                "chunk_text": chunk_text,
+            }
+            async with self.SessionLocal.begin() as session:
+                await session.execute(_UPSERT_CHUNKS, [row])
+            self._invalidate(chunk_ids=[chunk_id], chunk_doc_ids=[doc_id])
         except Exception as e:
             logger.error(f"Error adding chunk {chunk_id}: {e}")
             raise StorageError(f"Failed to add chunk: {e}")
     
+    async def bulk_upsert_chunks(self, doc_id: str, chunks: List[Dict[str, Any]]) -> None:
+        """
+        Upsert many chunks of a document with one INSERT ... ON CONFLICT statement.
+        
+        Args:
+            doc_id: Document the chunks belong to
+            chunks: Chunk dicts with 'chunk_id', 'chunk_path', 'chunk_name' and
+                optional 'chunk_source' / 'chunk_level' / 'chunk_text'
+        """
+        if not chunks:
+            return
+        try:
+            rows = []
+            for chunk in chunks:
+                chunk_source_enum, chunk_level_enum = _parse_chunk_enums(
+                    chunk.get("chunk_source"), chunk.get("chunk_level")
+                )
+                rows.append({
+                    "chunk_id": chunk["chunk_id"],
+                    "doc_id": doc_id,
+                    "chunk_path": chunk["chunk_path"],
+                    "chunk_name": chunk["chunk_name"],
+                    "chunk_source": chunk_source_enum,
+                    "chunk_level": chunk_level_enum,
+                    "chunk_text": chunk.get("chunk_text"),
+                })
+            
+            async with self.SessionLocal.begin() as session:
+                # List of parameter sets -> asyncpg executemany in a single transaction
+                await session.execute(_UPSERT_CHUNKS, rows)
+            self._invalidate(chunk_ids=[row["chunk_id"] for row in rows], chunk_doc_ids=[doc_id])
+        except Exception as e:
+            logger.error(f"Error adding {len(chunks)} chunks for document {doc_id}: {e}")
+            raise StorageError(f"Failed to add chunks: {e}")
+    
     async def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        return await self._cached(self._doc_cache, doc_id, lambda: self._load_document(doc_id))
+    
+    async def _load_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         try:
-            with self.SessionLocal.begin() as session:
-                doc = session.query(DocumentModel).filter_by(doc_id=doc_id).first()
+            async with self.SessionLocal.begin() as session:
+                doc = (await session.execute(_Q_DOC_BY_ID, {"doc_id": doc_id})).scalar_one_or_none()
                 if not doc:
                     return None
-                return {
-                    "doc_id": doc.doc_id,
-                    "doc_name": doc.doc_name,
-                    "doc_size": doc.doc_size,
-                    "upload_date": doc.upload_date.isoformat() if doc.upload_date else None,
-                    "status": doc.status.value if isinstance(doc.status, DocumentStatus) else doc.status,
-                    "doc_authors": doc.doc_authors,
-                    "doc_abstract": doc.doc_abstract,
-                    "doc_path": doc.doc_path,
-                    "doc_published": doc.doc_published.isoformat() if doc.doc_published else None,
-                }
+                return _document_to_dict(doc)
         except Exception as e:
             logger.error(f"Error getting document {doc_id}: {e}")
             raise StorageError(f"Failed to get document: {e}")
     
+    async def get_documents_by_ids(
+        self, doc_ids: List[str], session: Optional[AsyncSession] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get many documents keyed by doc_id: cached ones from the document cache,
+        the rest with one WHERE doc_id = ANY(:doc_ids) query.
+        """
+        result = {}
+        missing = []
+        for doc_id in dict.fromkeys(doc_ids):
+            cached = self._doc_cache.get(doc_id)
+            if cached is not None:
+                result[doc_id] = dict(cached)
+            else:
+                missing.append(doc_id)
+        if not missing:
+            return result
+        generation = self._cache_generation
+        try:
+            async with self._read_session(session) as session:
+                docs = (await session.execute(_Q_DOCS_BY_IDS, {"doc_ids": missing})).scalars().all()
+                loaded = {doc.doc_id: _document_to_dict(doc) for doc in docs}
+        except Exception as e:
+            logger.error(f"Error getting {len(missing)} documents: {e}")
+            raise StorageError(f"Failed to get documents: {e}")
+        for doc_id, doc in loaded.items():
+            if generation == self._cache_generation:
+                self._doc_cache[doc_id] = doc
+            result[doc_id] = dict(doc)
+        return result
+    
     async def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        return await self._cached(self._chunk_cache, chunk_id, lambda: self._load_chunk(chunk_id))
+    
+    async def _load_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        chunks = await self.get_chunks_by_ids([chunk_id])
+        return chunks.get(chunk_id)
+    
+    async def get_chunks_by_ids(
+        self, chunk_ids: List[str], session: Optional[AsyncSession] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get chunk metadata for multiple chunks in one query, keyed by chunk_id"""
+        if not chunk_ids:
+            return {}
         try:
-            with self.SessionLocal.begin() as session:
-                chunk = session.query(ChunkModel).filter_by(chunk_id=chunk_id).first()
-                if not chunk:
-                    return None
+            async with self._read_session(session) as session:
+                chunks = (await session.execute(_Q_CHUNKS_BY_IDS, {"chunk_ids": list(chunk_ids)})).scalars().all()
                 return {
-                    "chunk_id": chunk.chunk_id,
-                    "doc_id": chunk.doc_id,
-                    "chunk_name": chunk.chunk_name,
-                    "chunk_path": chunk.chunk_path,
-                    "chunk_source": chunk.chunk_source.value if isinstance(chunk.chunk_source, ChunkSource) else chunk.chunk_source,
-                    "chunk_level": chunk.chunk_level.value if isinstance(chunk.chunk_level, ChunkLevel) else chunk.chunk_level,
+                    chunk.chunk_id: _chunk_to_dict(chunk, with_text=True)
+                    for chunk in chunks
                 }
         except Exception as e:
-            logger.error(f"Error getting chunk {chunk_id}: {e}")
-            raise StorageError(f"Failed to get chunk: {e}")
+            logger.error(f"Error getting {len(chunk_ids)} chunks: {e}")
+            raise StorageError(f"Failed to get chunks: {e}")
     
-    async def get_chunks_by_document(self, doc_id: str) -> List[Dict[str, Any]]:
+    async def get_chunks_by_document(
+        self, doc_id: str, session: Optional[AsyncSession] = None
+    ) -> List[Dict[str, Any]]:
         try:
-            with self.SessionLocal.begin() as session:
-                chunks = session.query(ChunkModel).filter_by(doc_id=doc_id).all()
-                return [
-                    {
-                        "chunk_id": chunk.chunk_id,
-                        "doc_id": chunk.doc_id,
-                        "chunk_name": chunk.chunk_name,
-                        "chunk_path": chunk.chunk_path,
-                        "chunk_source": chunk.chunk_source.value if isinstance(chunk.chunk_source, ChunkSource) else chunk.chunk_source,
-                        "chunk_level": chunk.chunk_level.value if isinstance(chunk.chunk_level, ChunkLevel) else chunk.chunk_level,
-                    }
-                    for chunk in chunks
-                ]
+            async with self._read_session(session) as session:
+                chunks = (await session.execute(_Q_CHUNKS_BY_DOC, {"doc_id": doc_id})).scalars().all()
+                return [_chunk_to_dict(chunk) for chunk in chunks]
         except Exception as e:
             logger.error(f"Error getting chunks for document {doc_id}: {e}")
             raise StorageError(f"Failed to get chunks: {e}")
     
+    async def list_all_chunks(self, session: Optional[AsyncSession] = None) -> List[Dict[str, Any]]:
+        """All chunks in one query, grouped by document"""
+        try:
+            async with self._read_session(session) as session:
+                chunks = (await session.execute(_Q_ALL_CHUNKS)).scalars().all()
+                return [_chunk_to_dict(chunk) for chunk in chunks]
+        except Exception as e:
+            logger.error(f"Error listing chunks: {e}")
+            raise StorageError(f"Failed to list chunks: {e}")
+    
     async def get_document_by_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
-        """Get document that contains a specific chunk"""
+        """Get document that contains a specific chunk (served from the chunk and document caches)"""
+        chunk = await self.get_chunk(chunk_id)
+        if not chunk:
+            return None
+        return await self.get_document(chunk["doc_id"])
+    
+    async def get_documents_by_chunk_ids(
+        self, chunk_ids: List[str], session: Optional[AsyncSession] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get the containing document for multiple chunks in one query, keyed by chunk_id"""
+        if not chunk_ids:
+            return {}
         try:
-            with self.SessionLocal.begin() as session:
-                chunk = session.query(ChunkModel).filter_by(chunk_id=chunk_id).first()
-                if not chunk:
-                    return None
-                
-                # Get document via relationship
-                doc = chunk.document
-                if not doc:
-                    return None
-                
+            async with self._read_session(session) as session:
+                rows = (await session.execute(_Q_DOCS_BY_CHUNK_IDS, {"chunk_ids": list(chunk_ids)})).all()
                 return {
-                    "doc_id": doc.doc_id,
-                    "doc_name": doc.doc_name,
-                    "doc_size": doc.doc_size,
-                    "upload_date": doc.upload_date.isoformat() if doc.upload_date else None,
-                    "status": doc.status.value if isinstance(doc.status, DocumentStatus) else doc.status,
-                    "doc_authors": doc.doc_authors,
-                    "doc_abstract": doc.doc_abstract,
-                    "doc_path": doc.doc_path,
-                    "doc_published": doc.doc_published.isoformat() if doc.doc_published else None,
+                    chunk_id: _document_to_dict(doc)
+                    for chunk_id, doc in rows
                 }
         except Exception as e:
-            logger.error(f"Error getting document for chunk {chunk_id}: {e}")
-            raise StorageError(f"Failed to get document by chunk: {e}")
+            logger.error(f"Error getting documents for {len(chunk_ids)} chunks: {e}")
+            raise StorageError(f"Failed to get documents by chunks: {e}")
     
     async def delete_document(self, doc_id: str) -> None:
         """Delete document and all its chunks (cascade delete)"""
         try:
-            with self.SessionLocal.begin() as session:
-                doc = session.query(DocumentModel).filter_by(doc_id=doc_id).first()
-                if doc:
-                    session.delete(doc)
+            async with self.SessionLocal.begin() as session:
+                await session.execute(delete(ChunkModel).where(ChunkModel.doc_id == doc_id))
+                await session.execute(delete(DocumentModel).where(DocumentModel.doc_id == doc_id))
+            self._invalidate(doc_ids=[doc_id])
+            self._invalidate_document_chunks(doc_id)
+        except Exception as e:
+            logger.error(f"Error deleting document {doc_id}: {e}")
+            raise StorageError(f"Failed to delete document: {e}")
+    
+    async def delete_document_returning_chunks(self, doc_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Delete document and its chunks in one transaction, returning the deleted chunks.
+        
+        Uses DELETE ... RETURNING so no separate SELECT is needed.
+        
+        Returns:
+            List of deleted chunks with 'chunk_id' and 'chunk_path', or None if the document does not exist
+        """
+        try:
+            async with self.SessionLocal.begin() as session:
+                chunk_rows = (await session.execute(
+                    delete(ChunkModel)
+                    .where(ChunkModel.doc_id == doc_id)
+                    .returning(ChunkModel.chunk_id, ChunkModel.chunk_path)
+                )).all()
+                doc_row = (await session.execute(
+                    delete(DocumentModel)
+                    .where(DocumentModel.doc_id == doc_id)
+                    .returning(DocumentModel.doc_id)
+                )).first()
+            if doc_row is None:
+                return None
+            self._invalidate(doc_ids=[doc_id], chunk_ids=[chunk_id for chunk_id, _ in chunk_rows])
+            return [
+                {"chunk_id": chunk_id, "chunk_path": chunk_path}
+                for chunk_id, chunk_path in chunk_rows
+            ]
         except Exception as e:
             logger.error(f"Error deleting document {doc_id}: {e}")
             raise StorageError(f"Failed to delete document: {e}")
@@ -277,19 +666,24 @@ class DocumentSQLStore(BaseDocumentSQLStore):
     async def delete_chunk(self, chunk_id: str) -> None:
         """Delete chunk metadata"""
         try:
-            with self.SessionLocal.begin() as session:
-                chunk = session.query(ChunkModel).filter_by(chunk_id=chunk_id).first()
+            async with self.SessionLocal.begin() as session:
+                chunk = (await session.execute(
+                    select(ChunkModel).where(ChunkModel.chunk_id == chunk_id)
+                )).scalar_one_or_none()
                 if chunk:
-                    session.delete(chunk)
+                    await session.delete(chunk)
                 else:
                     raise StorageError(f"Chunk {chunk_id} not found")
+            self._invalidate(chunk_ids=[chunk_id], chunk_doc_ids=[chunk.doc_id])
         except StorageError:
             raise
         except Exception as e:
             logger.error(f"Error deleting chunk {chunk_id}: {e}")
             raise StorageError(f"Failed to delete chunk: {e}")
     
-    async def list_documents(self, filter: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    async def list_documents(
+        self, filter: Optional[List[str]] = None, session: Optional[AsyncSession] = None
+    ) -> List[Dict[str, Any]]:
         """
         List documents with optional filter.
         
@@ -298,70 +692,135 @@ class DocumentSQLStore(BaseDocumentSQLStore):
                    If None, returns all documents.
                    Example: ["uploaded", "error"] to get unprocessed documents.
                    Currently supports status filtering, but can be extended for other filters.
+            session: Optional caller-owned session (see _read_session)
         
         Returns:
             List of document dictionaries with metadata
         """
         try:
-            with self.SessionLocal.begin() as session:
-                query = session.query(DocumentModel)
+            async with self._read_session(session) as session:
+                # Chunk counts are aggregated server-side; chunk rows are never loaded
+                query = (
+                    select(*_DOCUMENT_COLUMNS, func.count(ChunkModel.chunk_id).label("num_chunks"))
+                    .outerjoin(ChunkModel, ChunkModel.doc_id == DocumentModel.doc_id)
+                    .group_by(DocumentModel.doc_id)
+                )
                 
                 # Apply filter if provided (currently supports status filtering)
                 if filter:
                     # Convert string statuses to DocumentStatus enums
                     status_enums = [DocumentStatus(status) for status in filter]
-                    query = query.filter(DocumentModel.status.in_(status_enums))
+                    query = query.where(DocumentModel.status.in_(status_enums))
                 
-                docs = query.all()
+                rows = (await session.execute(query)).all()
                 result = []
-                for doc in docs:
-                    # Count chunks for this document
-                    chunk_count = len(doc.chunks) if doc.chunks else 0
-                    result.append({
-                        "doc_id": doc.doc_id,
-                        "doc_name": doc.doc_name,
-                        "doc_size": doc.doc_size,
-                        "upload_date": doc.upload_date.isoformat() if doc.upload_date else None,
-                        "status": doc.status.value if isinstance(doc.status, DocumentStatus) else doc.status,
-                        "doc_authors": doc.doc_authors,
-                        "doc_abstract": doc.doc_abstract,
-                        "doc_path": doc.doc_path,
-                        "doc_published": doc.doc_published.isoformat() if doc.doc_published else None,
-                        "num_chunks": chunk_count
-                    })
+                for row in rows:
+                    doc = _document_to_dict(row)
+                    doc["num_chunks"] = row.num_chunks
+                    result.append(doc)
                 return result
         except Exception as e:
             logger.error(f"Error listing documents: {e}")
             raise StorageError(f"Failed to list documents: {e}")
     
-    async def get_document_with_chunks(self, doc_id: str) -> Optional[Dict[str, Any]]:
+    async def iter_documents(
+        self,
+        filter: Optional[List[str]] = None,
+        batch_size: int = 256
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate documents with optional status filter using keyset pagination.
+        
+        Pages are ordered by (upload_date, doc_id) and each page starts after the last
+        key of the previous one, so rows whose status changes mid-iteration are
+        neither skipped nor repeated. Only one page is held in memory at a time.
+        
+        Args:
+            filter: Optional list of status values to filter by (see list_documents)
+            batch_size: Documents fetched per query
+        
+        Yields:
+            Document dictionaries with metadata (without 'num_chunks')
+        """
+        status_enums = [DocumentStatus(status) for status in filter] if filter else None
+        last_key = None
+        
+        while True:
+            try:
+                async with self.SessionLocal.begin() as session:
+                    query = select(*_DOCUMENT_COLUMNS)
+                    if status_enums:
+                        query = query.where(DocumentModel.status.in_(status_enums))
+                    if last_key is not None:
+                        last_date, last_id = last_key
+                        query = query.where(or_(
+                            DocumentModel.upload_date > last_date,
+                            and_(DocumentModel.upload_date == last_date, DocumentModel.doc_id > last_id),
+                        ))
+                    docs = (await session.execute(
+                        query.order_by(DocumentModel.upload_date, DocumentModel.doc_id)
+                        .limit(batch_size)
+                    )).all()
+                    if docs:
+                        last_key = (docs[-1].upload_date, docs[-1].doc_id)
+                    page = [_document_to_dict(doc) for doc in docs]
+            except Exception as e:
+                logger.error(f"Error iterating documents: {e}")
+                raise StorageError(f"Failed to iterate documents: {e}")
+            
+            # Yield outside the session so no transaction stays open while callers work
+            for doc in page:
+                yield doc
+            if len(page) < batch_size:
+                return
+    
+    async def get_document_with_chunks_json(self, doc_id: str) -> Optional[bytes]:
+        """
+        get_document_with_chunks as JSON bytes, cached until the document or its chunks change.
+        
+        The JSON is built server-side with jsonb_build_object/jsonb_agg, so a miss is a
+        single query with no ORM hydration or Python-side serialization.
+        
+        Returns:
+            JSON bytes, or None if the document does not exist
+        """
+        cached = self._doc_json_cache.get(doc_id)
+        if cached is not None:
+            return cached
+        generation = self._cache_generation
+        try:
+            async with self.SessionLocal.begin() as session:
+                doc_json = (await session.execute(_Q_DOC_WITH_CHUNKS_JSON, {"doc_id": doc_id})).scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Error getting document with chunks {doc_id}: {e}")
+            raise StorageError(f"Failed to get document with chunks: {e}")
+        if doc_json is None:
+            return None
+        data = doc_json.encode()
+        if generation == self._cache_generation:
+            self._doc_json_cache[doc_id] = data
+        return data
+    
+    async def get_document_with_chunks(
+        self, doc_id: str, session: Optional[AsyncSession] = None
+    ) -> Optional[Dict[str, Any]]:
         try:
-            with self.SessionLocal.begin() as session:
-                doc = session.query(DocumentModel).filter_by(doc_id=doc_id).first()
+            async with self._read_session(session) as session:
+                doc = (await session.execute(_Q_DOC_WITH_CHUNKS, {"doc_id": doc_id})).scalar_one_or_none()
                 if not doc:
                     return None
                 
-                result = {
-                    "doc_id": doc.doc_id,
-                    "doc_name": doc.doc_name,
-                    "doc_size": doc.doc_size,
-                    "upload_date": doc.upload_date.isoformat() if doc.upload_date else None,
-                    "status": doc.status.value if isinstance(doc.status, DocumentStatus) else doc.status,
-                    "doc_authors": doc.doc_authors,
-                    "doc_abstract": doc.doc_abstract,
-                    "doc_path": doc.doc_path,
-                    "doc_published": doc.doc_published.isoformat() if doc.doc_published else None,
-                    "chunks": [
-                        {
-                            "chunk_id": chunk.chunk_id,
-                            "chunk_name": chunk.chunk_name,
-                            "chunk_path": chunk.chunk_path,
-                            "chunk_source": chunk.chunk_source.value if isinstance(chunk.chunk_source, ChunkSource) else chunk.chunk_source,
-                            "chunk_level": chunk.chunk_level.value if isinstance(chunk.chunk_level, ChunkLevel) else chunk.chunk_level
-                        }
-                        for chunk in doc.chunks
-                    ]
-                }
+                result = _document_to_dict(doc)
+                result["chunks"] = [
+                    {
+                        "chunk_id": chunk.chunk_id,
+                        "chunk_name": chunk.chunk_name,
+                        "chunk_path": chunk.chunk_path,
+                        "chunk_source": chunk.chunk_source.value,
+                        "chunk_level": chunk.chunk_level.value
+                    }
+                    for chunk in doc.chunks
+                ]
                 return result
         except Exception as e:
             logger.error(f"Error getting document with chunks {doc_id}: {e}")
@@ -373,11 +832,73 @@ class DocumentSQLStore(BaseDocumentSQLStore):
             if status not in ["uploaded", "processing", "processed", "error"]:
                 raise ValueError(f"Invalid status: {status}. Must be one of: uploaded, processing, processed, error")
             
-            with self.SessionLocal.begin() as session:
-                doc = session.query(DocumentModel).filter_by(doc_id=doc_id).first()
-                if doc:
-                    doc.status = DocumentStatus(status)
+            async with self.SessionLocal.begin() as session:
+                await session.execute(
+                    update(DocumentModel)
+                    .where(DocumentModel.doc_id == doc_id)
+                    .values(status=DocumentStatus(status))
+                )
+            self._invalidate(doc_ids=[doc_id])
         except Exception as e:
             logger.error(f"Error updating document status {doc_id}: {e}")
             raise StorageError(f"Failed to update document status: {e}")
-
+    
+    async def set_status_and_get(self, doc_id: str, status: str) -> Optional[Dict[str, Any]]:
+        """
+        Update document status and return the updated document.
+        
+        Uses UPDATE ... RETURNING, so the status change and the read are one statement.
+        
+        Returns:
+            Document dictionary with metadata, or None if the document does not exist
+        """
+        try:
+            if status not in ["uploaded", "processing", "processed", "error"]:
+                raise ValueError(f"Invalid status: {status}. Must be one of: uploaded, processing, processed, error")
+            
+            async with self.SessionLocal.begin() as session:
+                doc = (await session.execute(
+                    update(DocumentModel)
+                    .where(DocumentModel.doc_id == doc_id)
+                    .values(status=DocumentStatus(status))
+                    .returning(DocumentModel)
+                )).scalars().first()
+            if not doc:
+                return None
+            self._invalidate(doc_ids=[doc_id])
+            return _document_to_dict(doc)
+        except Exception as e:
+            logger.error(f"Error updating document status {doc_id}: {e}")
+            raise StorageError(f"Failed to update document status: {e}")
+    
+    async def bulk_update_status(self, doc_ids: List[str], status: str) -> None:
+        """Set status on many documents with one UPDATE ... WHERE doc_id = ANY(:doc_ids)"""
+        if not doc_ids:
+            return
+        try:
+            if status not in ["uploaded", "processing", "processed", "error"]:
+                raise ValueError(f"Invalid status: {status}. Must be one of: uploaded, processing, processed, error")
+            
+            async with self.SessionLocal.begin() as session:
+                await session.execute(
+                    _UPDATE_STATUSES, {"doc_ids": list(doc_ids), "status": DocumentStatus(status)}
+                )
+            self._invalidate(doc_ids=doc_ids)
+        except Exception as e:
+            logger.error(f"Error updating status of {len(doc_ids)} documents: {e}")
+            raise StorageError(f"Failed to update document statuses: {e}")
+    
+    async def update_doc_paths(self, doc_paths: Dict[str, str]) -> None:
+        """Set doc_path on many documents with one executemany UPDATE (unknown doc_ids are skipped)"""
+        if not doc_paths:
+            return
+        try:
+            async with self.SessionLocal.begin() as session:
+                await session.execute(
+                    _UPDATE_DOC_PATH,
+                    [{"b_doc_id": doc_id, "b_doc_path": doc_path} for doc_id, doc_path in doc_paths.items()]
+                )
+            self._invalidate(doc_ids=list(doc_paths))
+        except Exception as e:
+            logger.error(f"Error updating paths of {len(doc_paths)} documents: {e}")
+            raise StorageError(f"Failed to update document paths: {e}")
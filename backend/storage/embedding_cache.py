@@ -0,0 +1,102 @@
+"""
+Content-hash keyed embedding cache backed by the document SQL store
+"""
+
+import hashlib
+import logging
+from typing import List, Dict, Tuple, Union
+
+import numpy as np
+from sqlalchemy import select, Column, String, Integer, LargeBinary
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from storage.document_sql_store import Base, DocumentSQLStore
+from core.exceptions import StorageError
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCacheModel(Base):
+    __tablename__ = "embedding_cache"
+
+    key = Column(String, primary_key=True)  # sha256(content) + ":" + model_id
+    model = Column(String, nullable=False)
+    single_vec = Column(LargeBinary, nullable=False)  # float16 (D,)
+    multi_vec = Column(LargeBinary, nullable=False)   # float16 (N, multi_dim), row-major
+    multi_dim = Column(Integer, nullable=False)
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by (content hash, model id).
+
+    Vectors are stored as float16 to halve cache size; they are returned as
+    float32 lists.
+    """
+
+    def __init__(self, document_sql_store: DocumentSQLStore):
+        self.engine = document_sql_store.engine
+        self.SessionLocal = document_sql_store.SessionLocal
+    
+    async def init(self) -> None:
+        """Create the cache table if it doesn't exist (call once at startup)"""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(EmbeddingCacheModel.__table__.create, checkfirst=True)
+
+    @staticmethod
+    def make_key(content: Union[str, bytes], model_id: str) -> str:
+        """Build a cache key from embedable content (text, base64 or raw PDF bytes)"""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return hashlib.sha256(content).hexdigest() + ":" + model_id
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Tuple[List[float], List[List[float]]]]:
+        """Get cached (single_vector, multi_vectors) for keys that are present"""
+        if not keys:
+            return {}
+        try:
+            async with self.SessionLocal.begin() as session:
+                rows = (await session.execute(
+                    select(EmbeddingCacheModel).where(EmbeddingCacheModel.key.in_(keys))
+                )).scalars().all()
+                return {
+                    row.key: (
+                        np.frombuffer(row.single_vec, dtype=np.float16).astype(np.float32).tolist(),
+                        np.frombuffer(row.multi_vec, dtype=np.float16)
+                        .reshape(-1, row.multi_dim).astype(np.float32).tolist(),
+                    )
+                    for row in rows
+                }
+        except Exception as e:
+            logger.error(f"Error reading {len(keys)} cached embeddings: {e}")
+            raise StorageError(f"Failed to read embedding cache: {e}")
+
+    async def put_many(
+        self,
+        entries: Dict[str, Tuple[List[float], List[List[float]]]],
+        model_id: str
+    ) -> None:
+        """Store (single_vector, multi_vectors) per key"""
+        if not entries:
+            return
+        try:
+            rows = []
+            for key, (single_vector, multi_vectors) in entries.items():
+                multi = np.asarray(multi_vectors, dtype=np.float16)
+                rows.append({
+                    "key": key,
+                    "model": model_id,
+                    "single_vec": np.asarray(single_vector, dtype=np.float16).tobytes(),
+                    "multi_vec": multi.tobytes(),
+                    "multi_dim": multi.shape[-1],
+                })
+            stmt = pg_insert(EmbeddingCacheModel)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[EmbeddingCacheModel.key],
+                set_={k: stmt.excluded[k] for k in ("model", "single_vec", "multi_vec", "multi_dim")}
+            )
+            async with self.SessionLocal.begin() as session:
+                await session.execute(stmt, rows)
+        except Exception as e:
+            logger.error(f"Error writing {len(entries)} cached embeddings: {e}")
+            raise StorageError(f"Failed to write embedding cache: {e}")
@@ -2,20 +2,32 @@
 PDF file storage abstraction
 """
 
+import asyncio
+import hashlib
 import logging
+import os
+import aiofiles
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Set
 from core.config import settings
 from core.exceptions import StorageError
 from storage.base import BaseFileStore
+from utils.file_io import write_stream
 
 logger = logging.getLogger(__name__)
 
+FILE_PATH_CACHE_SIZE = 4096  # doc_id -> Path entries kept per store
+FILE_IO_CHUNK_SIZE = 1024 * 1024  # Bytes per aiofiles read/write call
+
 
 class FileStore(BaseFileStore):
     """
     File storage for PDF documents.
     Supports local file system (development) and object storage (production).
+    
+    Files are sharded into two levels of hex directories derived from a hash of
+    the doc_id (base_path/ab/cd/<doc_id>.pdf), keeping every directory small.
     """
     
     def __init__(self, storage_type: str = None, base_path: Path = None):
@@ -35,26 +47,108 @@ class FileStore(BaseFileStore):
         else:
             # TODO: Implement S3/MinIO support
             raise NotImplementedError(f"Storage type {self.storage_type} not yet implemented")
+        
+        # Paths are a pure function of doc_id: build each Path once
+        self._cached_file_path = lru_cache(maxsize=FILE_PATH_CACHE_SIZE)(self._build_file_path)
+        # Shard directories already created (at most 256 * 256 entries)
+        self._known_dirs: Set[Path] = set()
+    
+    def _build_file_path(self, doc_id: str) -> Path:
+        shard = hashlib.blake2b(doc_id.encode(), digest_size=2).hexdigest()
+        return self.base_path / shard[:2] / shard[2:4] / f"{doc_id}.pdf"
+    
+    def _ensure_parent(self, file_path: Path) -> None:
+        parent = file_path.parent
+        if parent not in self._known_dirs:
+            parent.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(parent)
+    
+    def list_flat_doc_ids(self) -> List[str]:
+        """Doc ids of files still in the old flat layout (base_path/<doc_id>.pdf)"""
+        with os.scandir(self.base_path) as entries:
+            return [
+                entry.name[:-len(".pdf")]
+                for entry in entries if entry.name.endswith(".pdf") and entry.is_file()
+            ]
+    
+    def move_flat_files(self, doc_ids: List[str]) -> None:
+        """Move flat-layout files into their shard directories (see list_flat_doc_ids)"""
+        for doc_id in doc_ids:
+            file_path = self.get_file_path(doc_id)
+            self._ensure_parent(file_path)
+            os.replace(self.base_path / f"{doc_id}.pdf", file_path)
+        if doc_ids:
+            logger.info(f"Moved {len(doc_ids)} files into sharded directories under {self.base_path}")
     
     def get_file_path(self, doc_id: str) -> Path:
-        return self.base_path / f"{doc_id}.pdf"
+        return self._cached_file_path(doc_id)
 
     async def save_file(self, doc_id: str, file_content_bytes: bytes) -> Path:
         try:
             file_path = self.get_file_path(doc_id)
-            file_path.write_bytes(file_content_bytes)
+            self._ensure_parent(file_path)
+            tmp_path = _tmp_path(file_path)
+            view = memoryview(file_content_bytes)
+            try:
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    for start in range(0, len(view), FILE_IO_CHUNK_SIZE):
+                        await f.write(view[start:start + FILE_IO_CHUNK_SIZE])
+                    await f.flush()
+                    await asyncio.to_thread(os.fsync, f.fileno())
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            logger.info(f"Saved file for doc_id {doc_id} to {file_path}")
+            return file_path
+        except Exception as e:
+            logger.error(f"Error saving file for doc_id {doc_id}: {e}")
+            raise StorageError(f"Failed to save file: {e}")
+    
+    async def save_file_stream(self, doc_id: str, file_stream: AsyncIterator[bytes]) -> Path:
+        """
+        Write chunks to disk as they arrive so the full file is never held in memory.
+        
+        The file is written to a temporary name, fsynced and then renamed into place,
+        so a crash never leaves a truncated PDF under the final path. Errors raised by
+        the stream (e.g. validation) or cancellation abort the write and remove the
+        partial file. Writes go through io_uring when settings.io_backend is "uring".
+        """
+        try:
+            file_path = self.get_file_path(doc_id)
+            self._ensure_parent(file_path)
+            tmp_path = _tmp_path(file_path)
+            try:
+                await write_stream(str(tmp_path), file_stream, fsync=True)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
             logger.info(f"Saved file for doc_id {doc_id} to {file_path}")
             return file_path
         except Exception as e:
+            if isinstance(e, StorageError):
+                raise
             logger.error(f"Error saving file for doc_id {doc_id}: {e}")
             raise StorageError(f"Failed to save file: {e}")
     
+    async def resolve_existing_path(self, doc_id: str) -> Optional[Path]:
+        """
+        Path of a stored file, for serving it with FileResponse (sendfile, no copy through Python).
+        
+        Returns:
+            File path, or None if the file does not exist
+        """
+        file_path = self.get_file_path(doc_id)
+        return file_path if await asyncio.to_thread(file_path.is_file) else None
+    
     async def get_file(self, doc_id: str) -> Optional[bytes]:
         try:
             file_path = self.get_file_path(doc_id)
-            if not file_path.exists():
-                return None
-            return file_path.read_bytes()
+            async with aiofiles.open(file_path, "rb") as f:
+                return await f.read()
+        except FileNotFoundError:
+            return None
         except Exception as e:
             logger.error(f"Error getting file for doc_id {doc_id}: {e}")
             raise StorageError(f"Failed to get file: {e}")
@@ -62,9 +156,8 @@ class FileStore(BaseFileStore):
     async def delete_file(self, doc_id: str) -> None:
         try:
             file_path = self.get_file_path(doc_id)
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"Deleted file for doc_id {doc_id}")
+            await asyncio.to_thread(file_path.unlink, missing_ok=True)
+            logger.info(f"Deleted file for doc_id {doc_id}")
         except Exception as e:
             logger.error(f"Error deleting file for doc_id {doc_id}: {e}")
             raise StorageError(f"Failed to delete file: {e}")
@@ -73,5 +166,28 @@ class FileStore(BaseFileStore):
         file_path = self.get_file_path(doc_id)
         return file_path.exists()
     
+    def list_doc_ids(self) -> Set[str]:
+        """Doc ids of all stored files, from one scan of the shard directories"""
+        try:
+            doc_ids = set()
+            for level1 in _scan_dirs(self.base_path):
+                for level2 in _scan_dirs(level1):
+                    with os.scandir(level2) as entries:
+                        doc_ids.update(
+                            entry.name[:-len(".pdf")]
+                            for entry in entries
+                            if entry.name.endswith(".pdf") and entry.is_file()
+                        )
+            return doc_ids
+        except Exception as e:
+            logger.error(f"Error listing files in {self.base_path}: {e}")
+            raise StorageError(f"Failed to list files: {e}")
+
+
+def _scan_dirs(path) -> list:
+    with os.scandir(path) as entries:
+        return [entry.path for entry in entries if entry.is_dir()]
 
 
+def _tmp_path(file_path: Path) -> Path:
+    return file_path.with_suffix(".pdf.tmp")
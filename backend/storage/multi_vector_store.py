@@ -1,13 +1,29 @@
 """
 Multi-vector store implementation (file-based for dev)
+
+Layout under store_path:
+- vectors/<chunk_id>.<uuid>.bin: one raw [N, d] array per chunk version, in the
+  store dtype (int8: the quantized [N, d] block followed by [N] float16 per-row scales)
+- multi_vector_index.json: manifest {chunk_id: {"file", "shape", "dtype"[, "scale_dtype"]}}
+
+Adding or deleting a chunk touches only that chunk's file, and reads
+memory-map the chunk file instead of unpickling an index. Manifest saves are
+coalesced: mutations mark it dirty and one save runs multi_vector_flush_interval
+seconds later (or on flush() at shutdown). Files are never rewritten in place:
+a re-add writes a new file, and replaced or deleted files are unlinked only
+after the manifest that stops referencing them is saved.
 """
 
+import asyncio
+import json
 import logging
+import os
 import pickle
+import uuid
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import numpy as np
-from storage.base import BaseMultiVectorStore
+from storage.base import BaseMultiVectorStore, Vectors
 from core.config import settings
 from core.exceptions import StorageError
 
@@ -15,16 +31,17 @@ logger = logging.getLogger(__name__)
 
 
 class MultiVectorStore(BaseMultiVectorStore):
-    """Multi-vector store using file-based storage"""
-    
+    """Multi-vector store using one memory-mapped file per chunk"""
+
     def __init__(
         self,
         store_path=None,
+        dtype: str = None,
     ):
         store_path = store_path or settings.multi_vector_store_path
         if isinstance(store_path, str):
             store_path = Path(store_path)
-        
+
         # Resolve relative paths relative to backend directory
         if not store_path.is_absolute():
             # Get backend directory (parent of storage directory)
@@ -32,62 +49,253 @@ class MultiVectorStore(BaseMultiVectorStore):
             store_path = (backend_dir / store_path).resolve()
 
         self.store_path = store_path
-        self.store_path.mkdir(parents=True, exist_ok=True)
-        self.index_file = self.store_path / "multi_vector_index.pkl"
-        self._index: Dict[str, List[List[float]]] = self._load_index()
+        self.dtype = np.dtype(dtype or settings.multi_vector_store_dtype)
+        if self.dtype not in (np.float16, np.float32, np.int8):
+            raise ValueError(f"Unsupported multi-vector dtype: {self.dtype}. Must be float16, float32 or int8")
+        self.vectors_dir = self.store_path / "vectors"
+        self.vectors_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_file = self.store_path / "multi_vector_index.json"
+        self.legacy_index_file = self.store_path / "multi_vector_index.pkl"
+        self._manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+        # Serializes manifest mutations + saves; file I/O runs in worker threads
+        self._lock = asyncio.Lock()
+        self.flush_interval = settings.multi_vector_flush_interval
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        # Files of replaced/deleted entries, unlinked once the manifest is saved
+        self._pending_unlinks: List[str] = []
 
-        logger.info(f"MultiVectorStore initialized at: {self.store_path}")
+        logger.info(f"MultiVectorStore initialized at: {self.store_path} ({self.dtype})")
 
-    def _load_index(self) -> Dict[str, List[List[float]]]:
-        """Load index from disk"""
-        if self.index_file.exists():
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the manifest, migrating a legacy pickle index into per-chunk files if present"""
+        manifest = {}
+        manifest_ok = True
+        if self.manifest_file.exists():
             try:
-                with open(self.index_file, "rb") as f:
-                    return pickle.load(f)
+                with open(self.manifest_file, "rb") as f:
+                    manifest = json.load(f)
             except Exception as e:
-                logger.warning(f"Failed to load multi-vector index: {e}")
-        return {}
-    
-    def _save_index(self):
-        """Save index to disk"""
+                manifest_ok = False
+                logger.warning(f"Failed to load multi-vector manifest: {e}")
+
+        if self.legacy_index_file.exists():
+            try:
+                with open(self.legacy_index_file, "rb") as f:
+                    legacy = pickle.load(f)
+                for chunk_id, vectors in legacy.items():
+                    if chunk_id not in manifest:
+                        manifest[chunk_id] = self._write_vectors(chunk_id, vectors)
+                self._manifest = manifest
+                self._save_manifest()
+                self.legacy_index_file.unlink()
+                logger.info(f"Migrated {len(legacy)} chunks from legacy multi-vector index")
+            except Exception as e:
+                logger.warning(f"Failed to migrate legacy multi-vector index: {e}")
+        
+        # Entries whose file is gone or truncated (e.g. deleted by hand) cannot be read
+        broken = [cid for cid, entry in manifest.items() if not self._file_matches(entry)]
+        for cid in broken:
+            del manifest[cid]
+        if broken:
+            logger.warning(f"Dropped {len(broken)} multi-vector manifest entries with missing or mis-sized files")
+        
+        # Files no saved manifest references: writes or unlinks a crash interrupted.
+        # Skipped if the manifest was unreadable, so its files can still be recovered.
+        if manifest_ok:
+            referenced = {entry["file"] for entry in manifest.values()}
+            for path in self.vectors_dir.iterdir():
+                if path.name not in referenced:
+                    path.unlink(missing_ok=True)
+        return manifest
+
+    def _save_manifest(self) -> None:
+        """Write the manifest atomically (temp file + fsync + rename), so a crash never leaves it truncated"""
         try:
-            with open(self.index_file, "wb") as f:
-                pickle.dump(self._index, f)
+            tmp = self.manifest_file.with_suffix(".json.tmp")
+            with open(tmp, "w") as f:
+                json.dump(self._manifest, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.manifest_file)
         except Exception as e:
-            logger.error(f"Failed to save multi-vector index: {e}")
+            logger.error(f"Failed to save multi-vector manifest: {e}")
             raise StorageError(f"Failed to save index: {e}")
+
+    def _write_vectors(self, chunk_id: str, embeddings: Vectors) -> Dict[str, Any]:
+        """Write one chunk's vectors to its own file and return its manifest entry"""
+        if self.dtype == np.int8:
+            return self._write_quantized(chunk_id, embeddings)
+        vectors = np.ascontiguousarray(embeddings, dtype=self.dtype)
+        if vectors.ndim != 2:
+            raise ValueError(f"Expected [N, d] multi-vectors, got shape {vectors.shape}")
+        file_name = self._write_file(chunk_id, vectors.tobytes())
+        return {"file": file_name, "shape": list(vectors.shape), "dtype": vectors.dtype.str}
+
+    def _write_quantized(self, chunk_id: str, embeddings: Vectors) -> Dict[str, Any]:
+        """Symmetric per-row int8 quantization: row ~= q * scale, scale = max|row| / 127"""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError(f"Expected [N, d] multi-vectors, got shape {vectors.shape}")
+        scale = np.abs(vectors).max(axis=1, keepdims=True) / 127.0
+        scale[scale == 0] = 1.0  # All-zero rows quantize to zeros
+        q = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+        file_name = self._write_file(chunk_id, q.tobytes(), scale.astype(np.float16).tobytes())
+        return {
+            "file": file_name,
+            "shape": list(q.shape),
+            "dtype": q.dtype.str,
+            "scale_dtype": np.dtype(np.float16).str,
+        }
+
+    def _write_file(self, chunk_id: str, *buffers: bytes) -> str:
+        """
+        Write (+ fsync) a new, uniquely named file for one chunk version and return its name.
+        
+        The file is unreferenced until its manifest entry is saved, so a crash
+        mid-write leaves only an orphan, which the next _load_manifest removes.
+        """
+        file_name = f"{chunk_id}.{uuid.uuid4().hex}.bin"
+        path = self.vectors_dir / file_name
+        try:
+            with open(path, "wb") as f:
+                for buffer in buffers:
+                    f.write(buffer)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return file_name
+
+    @staticmethod
+    def _file_size(entry: Dict[str, Any]) -> int:
+        """Expected byte size of an entry's file"""
+        rows = entry["shape"][0]
+        size = int(np.prod(entry["shape"])) * np.dtype(entry["dtype"]).itemsize
+        if "scale_dtype" in entry:
+            size += rows * np.dtype(entry["scale_dtype"]).itemsize
+        return size
+
+    def _file_matches(self, entry: Dict[str, Any]) -> bool:
+        try:
+            return (self.vectors_dir / entry["file"]).stat().st_size == self._file_size(entry)
+        except OSError:
+            return False
+
+    def _read_vectors(self, entry: Dict[str, Any]) -> np.ndarray:
+        """Memory-map one chunk's vectors (read-only); int8 entries are dequantized to float32"""
+        shape = tuple(entry["shape"])
+        dtype = np.dtype(entry["dtype"])
+        if shape[0] == 0:
+            return np.empty(shape, dtype=np.float32 if "scale_dtype" in entry else dtype)  # mmap cannot map an empty file
+        path = self.vectors_dir / entry["file"]
+        size = path.stat().st_size
+        if size != self._file_size(entry):
+            raise ValueError(f"{entry['file']} is {size} bytes, expected {self._file_size(entry)}")
+        vectors = np.memmap(path, dtype=dtype, mode="r", shape=shape)
+        if "scale_dtype" not in entry:
+            return vectors
+        scale = np.memmap(
+            path, dtype=np.dtype(entry["scale_dtype"]), mode="r",
+            offset=vectors.nbytes, shape=(shape[0], 1)
+        )
+        return vectors.astype(np.float32) * scale.astype(np.float32)
+
+    def _mark_dirty(self) -> None:
+        """Schedule one manifest save for this burst of mutations (call with the lock held)"""
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except StorageError:
+            pass  # Already logged; the manifest stays dirty and the next mutation or flush() retries
     
+    async def flush(self) -> None:
+        """Persist the manifest now if it has unsaved changes (called at shutdown)"""
+        async with self._lock:
+            if not self._dirty:
+                return
+            await asyncio.to_thread(self._save_manifest)
+            self._dirty = False
+            unlinks, self._pending_unlinks = self._pending_unlinks, []
+            if unlinks:
+                await asyncio.to_thread(self._unlink_files, unlinks)
+    
+    def _unlink_files(self, file_names: List[str]) -> None:
+        for file_name in file_names:
+            (self.vectors_dir / file_name).unlink(missing_ok=True)
+
     async def add(
         self,
         chunk_id: str,
-        embeddings: List[List[float]]
+        embeddings: Vectors
     ) -> None:
-        """Add multi-vectors to the store"""
+        """Add multi-vectors to the store, stored at the configured precision"""
         try:
-            self._index[chunk_id] = embeddings
-            self._save_index()
+            entry = await asyncio.to_thread(self._write_vectors, chunk_id, embeddings)
+            async with self._lock:
+                old = self._manifest.get(chunk_id)
+                self._manifest[chunk_id] = entry
+                if old:
+                    self._pending_unlinks.append(old["file"])
+                self._mark_dirty()
         except Exception as e:
             logger.error(f"Error adding multi-vectors {chunk_id}: {e}")
             raise StorageError(f"Failed to add multi-vectors: {e}")
-    
-    async def get(self, chunk_id: str) -> Optional[List[List[float]]]:
+
+    async def get(self, chunk_id: str) -> Optional[np.ndarray]:
         """Get multi-vectors for a chunk"""
-        return self._index.get(chunk_id)
-    
+        return (await self.batch_get([chunk_id])).get(chunk_id)
+
     async def batch_get(
         self,
         chunk_ids: List[str]
-    ) -> Dict[str, List[List[float]]]:
-        """Get multi-vectors for multiple chunks"""
-        return {cid: self._index.get(cid) for cid in chunk_ids if cid in self._index}
-    
+    ) -> Dict[str, np.ndarray]:
+        """
+        Get multi-vectors for multiple chunks (files are opened in a worker thread).
+        
+        Chunks whose file is missing or mis-sized are skipped with a warning, so one
+        bad file drops that chunk instead of failing the whole rerank.
+        """
+        entries = {cid: self._manifest[cid] for cid in chunk_ids if cid in self._manifest}
+        if not entries:
+            return {}
+        return await asyncio.to_thread(self._read_many, entries)
+
+    def _read_many(self, entries: Dict[str, Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        results = {}
+        for cid, entry in entries.items():
+            try:
+                results[cid] = self._read_vectors(entry)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping multi-vectors {cid}: {e}")
+        return results
+
     async def delete(self, chunk_id: str) -> None:
         """Delete multi-vectors from the store"""
         try:
-            if chunk_id in self._index:
-                del self._index[chunk_id]
-                self._save_index()
+            async with self._lock:
+                entry = self._manifest.pop(chunk_id, None)
+                if entry:
+                    self._pending_unlinks.append(entry["file"])
+                    self._mark_dirty()
         except Exception as e:
             logger.error(f"Error deleting multi-vectors {chunk_id}: {e}")
             raise StorageError(f"Failed to delete multi-vectors: {e}")
 
+    async def delete_many(self, chunk_ids: List[str]) -> None:
+        """Delete multi-vectors for multiple chunks"""
+        try:
+            async with self._lock:
+                removed = [self._manifest.pop(cid) for cid in chunk_ids if cid in self._manifest]
+                if removed:
+                    self._pending_unlinks.extend(entry["file"] for entry in removed)
+                    self._mark_dirty()
+        except Exception as e:
+            logger.error(f"Error deleting {len(chunk_ids)} multi-vectors: {e}")
+            raise StorageError(f"Failed to delete multi-vectors: {e}")
@@ -0,0 +1,123 @@
+"""
+Multi-vector store backed by the document PostgreSQL database (for production)
+"""
+
+import logging
+from typing import List, Dict, Optional
+
+import numpy as np
+from sqlalchemy import select, delete, any_, bindparam, Column, String, Integer, LargeBinary
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+
+from storage.base import BaseMultiVectorStore, Vectors
+from storage.document_sql_store import Base, DocumentSQLStore
+from core.config import settings
+from core.exceptions import StorageError
+
+logger = logging.getLogger(__name__)
+
+
+class MultiVectorModel(Base):
+    __tablename__ = "multi_vectors"
+
+    chunk_id = Column(String, primary_key=True)
+    dtype = Column(String, nullable=False)        # numpy dtype string, e.g. "<f2"
+    num_vectors = Column(Integer, nullable=False)
+    dim = Column(Integer, nullable=False)
+    vectors = Column(LargeBinary, nullable=False)  # [num_vectors, dim], row-major
+
+
+_Q_BY_IDS = select(MultiVectorModel).where(
+    MultiVectorModel.chunk_id == any_(bindparam("chunk_ids", type_=ARRAY(String)))
+)
+
+
+class PostgresMultiVectorStore(BaseMultiVectorStore):
+    """
+    Multi-vector store with one row per chunk in PostgreSQL.
+
+    Each chunk's [N, d] array is stored as raw bytes at the configured precision,
+    so an add is a single-row upsert and batch_get is one query, independent of
+    how many chunks the store holds. Shares the document store's connection pool.
+    """
+
+    def __init__(self, document_sql_store: DocumentSQLStore, dtype: str = None):
+        self.engine = document_sql_store.engine
+        self.SessionLocal = document_sql_store.SessionLocal
+        self.dtype = np.dtype(dtype or settings.multi_vector_store_dtype)
+        if self.dtype not in (np.float16, np.float32):
+            raise ValueError(f"Unsupported multi-vector dtype for postgres backend: {self.dtype}. Must be float16 or float32")
+
+    async def init(self) -> None:
+        """Create the multi-vector table if it doesn't exist (call once at startup)"""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(MultiVectorModel.__table__.create, checkfirst=True)
+
+    @staticmethod
+    def _to_array(row: MultiVectorModel) -> np.ndarray:
+        return np.frombuffer(row.vectors, dtype=np.dtype(row.dtype)).reshape(row.num_vectors, row.dim)
+
+    async def add(
+        self,
+        chunk_id: str,
+        embeddings: Vectors
+    ) -> None:
+        """Add multi-vectors to the store, stored at the configured precision"""
+        try:
+            vectors = np.ascontiguousarray(embeddings, dtype=self.dtype)
+            if vectors.ndim != 2:
+                raise ValueError(f"Expected [N, d] multi-vectors, got shape {vectors.shape}")
+            values = {
+                "chunk_id": chunk_id,
+                "dtype": vectors.dtype.str,
+                "num_vectors": vectors.shape[0],
+                "dim": vectors.shape[1],
+                "vectors": vectors.tobytes(),
+            }
+            stmt = pg_insert(MultiVectorModel).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MultiVectorModel.chunk_id],
+                set_={k: stmt.excluded[k] for k in values if k != "chunk_id"}
+            )
+            async with self.SessionLocal.begin() as session:
+                await session.execute(stmt)
+        except Exception as e:
+            logger.error(f"Error adding multi-vectors {chunk_id}: {e}")
+            raise StorageError(f"Failed to add multi-vectors: {e}")
+
+    async def get(self, chunk_id: str) -> Optional[np.ndarray]:
+        """Get multi-vectors for a chunk"""
+        vectors = await self.batch_get([chunk_id])
+        return vectors.get(chunk_id)
+
+    async def batch_get(
+        self,
+        chunk_ids: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Get multi-vectors for multiple chunks in one query"""
+        if not chunk_ids:
+            return {}
+        try:
+            async with self.SessionLocal.begin() as session:
+                rows = (await session.execute(_Q_BY_IDS, {"chunk_ids": list(chunk_ids)})).scalars().all()
+                return {row.chunk_id: self._to_array(row) for row in rows}
+        except Exception as e:
+            logger.error(f"Error getting {len(chunk_ids)} multi-vectors: {e}")
+            raise StorageError(f"Failed to get multi-vectors: {e}")
+
+    async def delete(self, chunk_id: str) -> None:
+        """Delete multi-vectors from the store"""
+        await self.delete_many([chunk_id])
+
+    async def delete_many(self, chunk_ids: List[str]) -> None:
+        """Delete multi-vectors for multiple chunks in one statement"""
+        if not chunk_ids:
+            return
+        try:
+            async with self.SessionLocal.begin() as session:
+                await session.execute(
+                    delete(MultiVectorModel).where(MultiVectorModel.chunk_id.in_(list(chunk_ids)))
+                )
+        except Exception as e:
+            logger.error(f"Error deleting {len(chunk_ids)} multi-vectors: {e}")
+            raise StorageError(f"Failed to delete multi-vectors: {e}")
@@ -3,9 +3,16 @@ Single vector store implementation using ChromaDB.
 Supports embedded (dev) and cloud (production) deployment modes.
 """
 
+import asyncio
+import json
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
 
 try:
     import chromadb
@@ -16,13 +23,94 @@ except ImportError:
     chromadb = None
     ChromaSettings = None
 
-from storage.base import BaseSingleVectorStore
+from storage.base import BaseSingleVectorStore, Vector, Vectors
 from core.config import settings
 from core.exceptions import StorageError
 
 logger = logging.getLogger(__name__)
 
 
+def _as_float32_rows(embeddings: Vectors) -> np.ndarray:
+    """
+    Pack embeddings into one contiguous [N, D] float32 array.
+    
+    The HNSW index stores float32 only, so this is the most compact form the
+    collection accepts; it avoids converting boxed Python floats element by element.
+    """
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+def _as_unit_rows(embeddings: Vectors) -> np.ndarray:
+    """
+    Pack embeddings as float32 rows and L2-normalize them for storage.
+    
+    The collection uses cosine space; storing unit vectors keeps every writer
+    consistent and makes stored distances plain 1 - dot products.
+    """
+    vectors = _as_float32_rows(embeddings)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+
+
+class _SimilarityCache:
+    """
+    LRU cache of query results, looked up by cosine similarity to cached query vectors.
+    
+    A query vector within `threshold` of a cached one (same filter, top_k no larger)
+    reuses that entry's results. Keys are L2-normalized float32 vectors, stacked
+    into one matrix so a lookup is a single BLAS matrix-vector product.
+    """
+    
+    def __init__(self, size: int, threshold: float):
+        self.size = size
+        self.threshold = threshold
+        self._entries: "OrderedDict[Tuple[str, bytes], Tuple[np.ndarray, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # Stacked keys, rebuilt after mutations
+        self._keys: List[Tuple[str, bytes]] = []
+        self.generation = 0  # Bumped by clear(); puts from queries that raced a write are dropped
+    
+    def _stacked(self) -> np.ndarray:
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._entries[k][0] for k in self._keys])
+        return self._matrix
+    
+    def get(self, vector: np.ndarray, top_k: int, filter_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for a normalized float32 vector, or None on a miss"""
+        if not self._entries:
+            return None
+        sims = self._stacked() @ vector
+        for idx in np.argsort(sims)[::-1]:
+            if sims[idx] < self.threshold:
+                break
+            key = self._keys[idx]
+            _, cached_k, results = self._entries[key]
+            if key[0] == filter_key and top_k <= cached_k:
+                self._entries.move_to_end(key)
+                return [dict(r) for r in results[:top_k]]
+        return None
+    
+    def put(
+        self,
+        vector: np.ndarray,
+        top_k: int,
+        filter_key: str,
+        results: List[Dict[str, Any]],
+        generation: int
+    ) -> None:
+        if generation != self.generation:
+            return
+        self._entries[(filter_key, vector.tobytes())] = (vector, top_k, [dict(r) for r in results])
+        self._entries.move_to_end((filter_key, vector.tobytes()))
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        self._matrix = None
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self._matrix = None
+        self.generation += 1
+
+
 class SingleVectorStore(BaseSingleVectorStore):
     """
     Single vector store using ChromaDB with flexible deployment modes.
@@ -68,12 +156,39 @@ class SingleVectorStore(BaseSingleVectorStore):
                 f"Supported: chromadb_embedded, chromadb_cloud"
             )
         
+        # Chroma's embedded client (and its telemetry event buffer) isn't safe under
+        # concurrent calls; every collection call goes through this lock
+        self._collection_lock = asyncio.Lock()
+        # Collection calls are blocking (HNSW + SQLite, or HTTP for cloud) and run here, off
+        # the event loop; several workers so cloud multi-vector query legs can overlap
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.vector_query_workers, thread_name_prefix="chroma"
+        )
+        # Results for recently seen query vectors; cleared on every write
+        self._query_cache = (
+            _SimilarityCache(settings.vector_query_cache_size, settings.vector_query_cache_threshold)
+            if settings.vector_query_cache_size > 0 else None
+        )
+        
+        # Cloud queries are independent HTTPS requests, so multi-vector queries fan out per vector;
+        # embedded queries stay one batched ANN call (the embedded client isn't thread-safe)
+        self._concurrent_legs = backend_type == "chromadb_cloud"
+        
         # Get or create collection
+        self.collection_name = collection_name
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
             metadata={"hnsw:space": "cosine"}
         )
         
+        # Cloud queries are independent HTTPS requests: with the pool enabled each query checks
+        # out its own client instead of queueing behind the collection lock
+        self._read_pool: Optional[asyncio.Queue] = None
+        if backend_type == "chromadb_cloud" and settings.chromadb_cloud_pool_enabled:
+            self._read_pool = asyncio.Queue()
+            for _ in range(settings.chromadb_cloud_pool_size):
+                self._read_pool.put_nowait(self._open_cloud_collection())
+        
         logger.info(f"Initialized SingleVectorStore with backend: {backend_type}, collection: {collection_name}")
     
     def _init_embedded(self, store_path: Optional[Path] = None):
@@ -114,12 +229,15 @@ class SingleVectorStore(BaseSingleVectorStore):
                 "ChromaDB Cloud requires tenant. Set CHROMADB_CLOUD_TENANT environment variable."
             )
         
+        self._cloud_kwargs = {"tenant": tenant, "database": database, "api_key": api_key}
+        self.client = self._connect_cloud()
+    
+    def _connect_cloud(self):
+        """Create a ChromaDB Cloud client from the credentials resolved in _init_cloud"""
         # Note: ChromaDB Cloud client may have different API - adjust if needed
         try:
-            self.client = chromadb.CloudClient(
-                tenant=tenant,
-                database=database,
-                api_key=api_key,
+            return chromadb.CloudClient(
+                **self._cloud_kwargs,
                 settings=ChromaSettings(anonymized_telemetry=False)
             )
         except AttributeError:
@@ -129,26 +247,116 @@ class SingleVectorStore(BaseSingleVectorStore):
                 "Ensure you're using a version of chromadb that supports CloudClient."
             )
     
+    def _open_cloud_collection(self):
+        """Open the collection on a fresh cloud client (one query pool slot)"""
+        return self._connect_cloud().get_collection(name=self.collection_name)
+    
+    async def _pooled_query(
+        self,
+        query_array: np.ndarray,
+        top_k: int,
+        where_clause: Optional[Dict[str, Any]]
+    ) -> Dict[str, List[List[Any]]]:
+        """Query through a client checked out of the cloud pool; a client that errors is replaced"""
+        collection = await self._read_pool.get()
+        try:
+            return await self._run(
+                collection.query, query_embeddings=query_array, n_results=top_k, where=where_clause
+            )
+        except Exception:
+            try:
+                collection = await self._run(self._open_cloud_collection)
+            except Exception as e:
+                logger.warning(f"Failed to replace pooled ChromaDB cloud client: {e}")
+            raise
+        finally:
+            self._read_pool.put_nowait(collection)
+    
+    async def _run(self, fn, *args, **kwargs):
+        """Run a blocking collection call in the store's worker threads"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args, **kwargs))
+    
+    async def warmup(self) -> None:
+        """
+        Load the HNSW index and SQLite pages with one real query (call once at startup),
+        so the first request doesn't pay the cold-open cost. No-op on an empty collection.
+        """
+        try:
+            async with self._collection_lock:
+                sample = await self._run(self.collection.peek, limit=1)
+                embeddings = sample.get("embeddings")
+                if embeddings is None or len(embeddings) == 0:
+                    return
+                await self._run(self.collection.query, query_embeddings=_as_float32_rows(embeddings), n_results=1)
+            logger.info("SingleVectorStore warmed up")
+        except Exception as e:
+            logger.warning(f"SingleVectorStore warmup failed: {e}")
+    
+    async def close(self) -> None:
+        """Stop the worker threads (call once at shutdown)"""
+        self._executor.shutdown(wait=True)
+    
+    def _clear_query_cache(self) -> None:
+        """Drop cached query results (any write can change them)"""
+        if self._query_cache is not None:
+            self._query_cache.clear()
+    
     async def add(
         self,
         chunk_id: str,
-        embedding: List[float],
+        embedding: Vector,
         metadata: Optional[Dict[str, Any]] = None
     ) -> None:
         """Add a vector to the store"""
+        await self.add_batch([chunk_id], [embedding], [metadata])
+    
+    async def add_batch(
+        self,
+        chunk_ids: List[str],
+        embeddings: Vectors,
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Add multiple vectors to the store in a single call (stored L2-normalized)"""
+        if len(chunk_ids) == 0:
+            return
         try:
-            self.collection.add(
-                ids=[chunk_id],
-                embeddings=[embedding],
-                metadatas=[metadata or {}]
-            )
+            async with self._collection_lock:
+                await self._run(
+                    self.collection.add,
+                    ids=chunk_ids,
+                    embeddings=_as_unit_rows(embeddings),
+                    metadatas=[m or {} for m in metadatas] if metadatas else [{} for _ in chunk_ids]
+                )
+                self._clear_query_cache()
         except Exception as e:
-            logger.error(f"Error adding vector {chunk_id}: {e}")
-            raise StorageError(f"Failed to add vector: {e}")
+            logger.error(f"Error adding {len(chunk_ids)} vectors: {e}")
+            raise StorageError(f"Failed to add vectors: {e}")
+    
+    async def _query_legs(
+        self,
+        query_array: np.ndarray,
+        top_k: int,
+        where_clause: Optional[Dict[str, Any]]
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Run one collection query per vector concurrently in worker threads (cloud only).
+        
+        Returns the legs stitched into the shape of a single multi-vector query result,
+        so latency is the slowest HTTP round trip rather than the sum. Legs run under
+        the caller's lock, so they never overlap a write.
+        """
+        legs = await asyncio.gather(*(
+            self._run(self.collection.query, query_embeddings=v[None, :], n_results=top_k, where=where_clause)
+            for v in query_array
+        ))
+        return {
+            key: [leg[key][0] if leg.get(key) else [] for leg in legs]
+            for key in ("ids", "distances", "metadatas")
+        }
     
     async def query(
         self,
-        query_vectors: List[List[float]],
+        query_vectors: Vectors,
         top_k: int = 10,
         filter: Optional[Dict[str, Any]] = None
     ) -> List[List[Dict[str, Any]]]:
@@ -156,7 +364,7 @@ class SingleVectorStore(BaseSingleVectorStore):
         Query the store with multiple query vectors.
         
         Args:
-            query_vectors: List of query embedding vectors
+            query_vectors: Query embedding vectors, as an [N, D] float32 array (lists are converted)
             top_k: Number of results to return per query
             filter: Optional metadata filter (must not be empty dict)
             
@@ -167,30 +375,27 @@ class SingleVectorStore(BaseSingleVectorStore):
             - 'metadata': Dict[str, Any] - Chunk metadata
         """
         try:
-            if not query_vectors:
+            if len(query_vectors) == 0:
                 raise ValueError("query_vectors list must not be empty")
             
             # Normalize empty filter to None (ChromaDB doesn't accept empty dict)
-            where_clause = None if (isinstance(filter, dict) and len(filter) == 0) else filter
+            where_clause = filter or None
             
-            results = self.collection.query(
-                query_embeddings=query_vectors,
-                n_results=top_k,
-                where=where_clause
-            )
+            query_array = _as_float32_rows(query_vectors)
+            if self._query_cache is None:
+                return await self._query_collection(query_array, top_k, where_clause)
             
-            # Format results for each query
-            all_formatted_results = []
-            for query_idx in range(len(query_vectors)):
-                formatted_results = []
-                if results["ids"] and len(results["ids"]) > query_idx and len(results["ids"][query_idx]) > 0:
-                    for i, chunk_id in enumerate(results["ids"][query_idx]):
-                        formatted_results.append({
-                            "chunk_id": chunk_id,
-                            "score": 1.0 - results["distances"][query_idx][i],  # Convert distance to similarity
-                            "metadata": results["metadatas"][query_idx][i] if results["metadatas"] and len(results["metadatas"]) > query_idx else {}
-                        })
-                all_formatted_results.append(formatted_results)
+            # Serve near-duplicate query vectors from the cache; query the collection for the rest
+            filter_key = json.dumps(where_clause, sort_keys=True) if where_clause else ""
+            cache_keys = query_array / (np.linalg.norm(query_array, axis=1, keepdims=True) + 1e-8)
+            all_formatted_results = [self._query_cache.get(key, top_k, filter_key) for key in cache_keys]
+            misses = [i for i, hit in enumerate(all_formatted_results) if hit is None]
+            if misses:
+                generation = self._query_cache.generation
+                fetched = await self._query_collection(query_array[misses], top_k, where_clause)
+                for i, formatted_results in zip(misses, fetched):
+                    self._query_cache.put(cache_keys[i], top_k, filter_key, formatted_results, generation)
+                    all_formatted_results[i] = formatted_results
             
             return all_formatted_results
 
@@ -198,36 +403,96 @@ class SingleVectorStore(BaseSingleVectorStore):
             logger.error(f"Error querying vectors: {e}")
             raise StorageError(f"Failed to query vectors: {e}")
     
-
+    async def _query_collection(
+        self,
+        query_array: np.ndarray,
+        top_k: int,
+        where_clause: Optional[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Query the collection directly and format one result list per query vector"""
+        if self._read_pool is not None:
+            results = await self._pooled_query(query_array, top_k, where_clause)
+        else:
+            async with self._collection_lock:
+                if len(query_array) == 1 or not self._concurrent_legs:
+                    results = await self._run(
+                        self.collection.query,
+                        query_embeddings=query_array,
+                        n_results=top_k,
+                        where=where_clause
+                    )
+                else:
+                    results = await self._query_legs(query_array, top_k, where_clause)
+        
+        # Format results for each query (row lookups hoisted out of the per-result loop)
+        ids_mat = results["ids"]
+        if not ids_mat:
+            return [[] for _ in range(len(query_array))]
+        dist_mat, meta_mat = results["distances"] or [], results["metadatas"] or []
+        all_formatted_results = []
+        for query_idx in range(len(query_array)):
+            ids = ids_mat[query_idx] if query_idx < len(ids_mat) else []
+            if len(ids) == 0:
+                all_formatted_results.append([])
+                continue
+            # Convert distances to similarities for the whole row at once
+            scores = (1.0 - np.asarray(dist_mat[query_idx], dtype=np.float64)).tolist()
+            metas = meta_mat[query_idx] if query_idx < len(meta_mat) else [{}] * len(ids)
+            all_formatted_results.append([
+                {"chunk_id": chunk_id, "score": score, "metadata": metadata}
+                for chunk_id, score, metadata in zip(ids, scores, metas)
+            ])
+        
+        return all_formatted_results
+    
     async def delete(self, chunk_id: str) -> None:
         """Delete a vector from the store"""
+        await self.delete_many([chunk_id])
+    
+    async def delete_many(self, chunk_ids: List[str]) -> None:
+        """Delete multiple vectors from the store in a single call"""
+        if not chunk_ids:
+            return
         try:
-            self.collection.delete(ids=[chunk_id])
+            async with self._collection_lock:
+                await self._run(self.collection.delete, ids=chunk_ids)
+                self._clear_query_cache()
         except Exception as e:
-            logger.error(f"Error deleting vector {chunk_id}: {e}")
-            raise StorageError(f"Failed to delete vector: {e}")
+            logger.error(f"Error deleting {len(chunk_ids)} vectors: {e}")
+            raise StorageError(f"Failed to delete vectors: {e}")
     
     
     async def update(
         self,
         chunk_id: str,
-        embedding: Optional[List[float]] = None,
+        embedding: Optional[Vector] = None,
         metadata: Optional[Dict[str, Any]] = None
     ) -> None:
         """Update a vector in the store"""
+        await self.update_batch(
+            [chunk_id],
+            [embedding] if embedding is not None and len(embedding) > 0 else None,
+            [metadata] if metadata else None
+        )
+    
+    async def update_batch(
+        self,
+        chunk_ids: List[str],
+        embeddings: Optional[Vectors] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Update multiple vectors (embeddings and/or metadata) in a single call"""
+        if len(chunk_ids) == 0 or (embeddings is None and not metadatas):
+            return
         try:
-            if embedding:
-                self.collection.update(
-                    ids=[chunk_id],
-                    embeddings=[embedding],
-                    metadatas=[metadata] if metadata else None
-                )
-            elif metadata:
-                self.collection.update(
-                    ids=[chunk_id],
-                    metadatas=[metadata]
+            async with self._collection_lock:
+                await self._run(
+                    self.collection.update,
+                    ids=chunk_ids,
+                    embeddings=_as_unit_rows(embeddings) if embeddings is not None else None,
+                    metadatas=metadatas or None
                 )
+                self._clear_query_cache()
         except Exception as e:
-            logger.error(f"Error updating vector {chunk_id}: {e}")
-            raise StorageError(f"Failed to update vector: {e}")
-
+            logger.error(f"Error updating {len(chunk_ids)} vectors: {e}")
+            raise StorageError(f"Failed to update vectors: {e}")
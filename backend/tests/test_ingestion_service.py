@@ -0,0 +1,46 @@
+"""
+Tests for embedding batch packing in IngestionService
+"""
+
+import asyncio
+
+from services.ingestion_service import IngestionService
+
+
+def _chunks(tmp_path, sizes):
+    chunks = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f"chunk-{i}.pdf"
+        path.write_bytes(b"x" * size)
+        chunks.append({"chunk_id": f"chunk-{i}", "chunk_path": str(path)})
+    return chunks
+
+
+def _batchify(chunks, **kwargs):
+    service = object.__new__(IngestionService)  # _batchify needs no service state
+    return asyncio.run(service._batchify(chunks, **kwargs))
+
+
+def _ids(batches):
+    return [[chunk["chunk_id"] for chunk in batch] for batch in batches]
+
+
+def test_batchify_packs_largest_first_under_byte_cap(tmp_path):
+    chunks = _chunks(tmp_path, [10, 60, 30, 50, 20])
+    batches = _batchify(chunks, max_bytes=80, max_items=10)
+    assert _ids(batches) == [["chunk-1"], ["chunk-3", "chunk-2"], ["chunk-4", "chunk-0"]]
+    assert sorted(c["chunk_id"] for batch in batches for c in batch) == [c["chunk_id"] for c in chunks]
+
+
+def test_batchify_caps_items_and_isolates_oversized_chunks(tmp_path):
+    chunks = _chunks(tmp_path, [500, 1, 1, 1, 1])
+    batches = _batchify(chunks, max_bytes=100, max_items=2)
+    assert _ids(batches)[0] == ["chunk-0"]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert sum(len(batch) for batch in batches) == 5
+
+
+def test_batchify_treats_missing_files_as_empty(tmp_path):
+    chunks = [{"chunk_id": "gone", "chunk_path": str(tmp_path / "missing.pdf")}, {"chunk_id": "no-path"}]
+    assert _ids(_batchify(chunks, max_bytes=10, max_items=10)) == [["gone", "no-path"]]
+
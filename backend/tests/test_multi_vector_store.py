@@ -0,0 +1,162 @@
+"""
+Tests for the file-based MultiVectorStore storage format
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from storage.multi_vector_store import MultiVectorStore
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_add_get_round_trip(tmp_path, dtype):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((7, 32)).astype(np.float32)
+
+    async def run():
+        store = MultiVectorStore(store_path=tmp_path, dtype=dtype)
+        await store.add("chunk-a", vectors)
+        await store.flush()
+        return await store.get("chunk-a")
+
+    restored = asyncio.run(run())
+    assert restored.shape == vectors.shape
+    if dtype == "float32":
+        np.testing.assert_array_equal(restored, vectors)
+    elif dtype == "float16":
+        np.testing.assert_allclose(restored, vectors, rtol=1e-3, atol=1e-3)
+    else:
+        # Per-row symmetric int8: error is at most half a quantization step (plus float16 scale rounding)
+        step = np.abs(vectors).max(axis=1, keepdims=True) / 127.0
+        assert np.all(np.abs(restored - vectors) <= 0.51 * step + 1e-3 * np.abs(vectors).max())
+        assert restored.dtype == np.float32
+
+
+def test_int8_file_holds_codes_and_scales(tmp_path):
+    vectors = np.array([[1.0, -2.0, 0.5], [0.0, 0.0, 0.0]], dtype=np.float32)
+
+    async def run():
+        store = MultiVectorStore(store_path=tmp_path, dtype="int8")
+        await store.add("chunk-a", vectors)
+        return store, await store.get("chunk-a")
+
+    store, restored = asyncio.run(run())
+    entry = store._manifest["chunk-a"]
+    assert entry["dtype"] == np.dtype(np.int8).str
+    assert entry["scale_dtype"] == np.dtype(np.float16).str
+    # [2, 3] int8 codes followed by [2] float16 scales
+    assert (store.vectors_dir / entry["file"]).stat().st_size == 2 * 3 + 2 * 2
+    np.testing.assert_array_equal(restored[1], np.zeros(3, dtype=np.float32))
+    assert restored[0, 1] == pytest.approx(-2.0, rel=1e-3)
+
+
+def test_manifest_reloads_after_restart(tmp_path):
+    vectors = np.ones((2, 4), dtype=np.float32)
+
+    async def write():
+        store = MultiVectorStore(store_path=tmp_path, dtype="int8")
+        await store.add("chunk-a", vectors)
+        await store.add("chunk-b", vectors * 2)
+        await store.delete("chunk-a")
+        await store.flush()
+
+    asyncio.run(write())
+    reopened = MultiVectorStore(store_path=tmp_path, dtype="int8")
+    restored = asyncio.run(reopened.batch_get(["chunk-a", "chunk-b"]))
+    assert list(restored) == ["chunk-b"]
+    np.testing.assert_allclose(restored["chunk-b"], vectors * 2, rtol=1e-2)
+
+
+def test_manifest_saves_are_coalesced(tmp_path, monkeypatch):
+    store = MultiVectorStore(store_path=tmp_path, dtype="float16")
+    store.flush_interval = 0.05
+    saves = []
+    save_manifest = store._save_manifest
+    monkeypatch.setattr(store, "_save_manifest", lambda: (saves.append(1), save_manifest()))
+
+    async def run():
+        await asyncio.gather(*(store.add(f"chunk-{i}", np.ones((2, 4))) for i in range(20)))
+        await store.delete("chunk-0")
+        assert saves == []  # Nothing written synchronously by the mutations
+        await asyncio.sleep(0.2)
+        assert len(saves) == 1  # One deferred save for the whole burst
+        await store.flush()  # Nothing dirty: no extra save
+        assert len(saves) == 1
+
+    asyncio.run(run())
+    reopened = MultiVectorStore(store_path=tmp_path, dtype="float16")
+    assert sorted(reopened._manifest) == sorted(f"chunk-{i}" for i in range(1, 20))
+
+
+def test_flush_persists_pending_changes_immediately(tmp_path):
+    store = MultiVectorStore(store_path=tmp_path, dtype="float16")
+    store.flush_interval = 60.0
+
+    async def run():
+        await store.add("chunk-a", np.ones((2, 4)))
+        await store.flush()
+        store._flush_task.cancel()
+
+    asyncio.run(run())
+    assert "chunk-a" in MultiVectorStore(store_path=tmp_path, dtype="float16")._manifest
+
+
+def test_readd_replaces_file_without_disturbing_open_readers(tmp_path):
+    store = MultiVectorStore(store_path=tmp_path, dtype="float32")
+    old = np.arange(8, dtype=np.float32).reshape(2, 4)
+    new = -np.arange(12, dtype=np.float32).reshape(3, 4)
+
+    async def run():
+        await store.add("chunk-a", old)
+        held = await store.get("chunk-a")  # memmap of the first file
+        await store.add("chunk-a", new)
+        current = await store.get("chunk-a")
+        assert len(list(store.vectors_dir.iterdir())) == 2  # Old file kept until the manifest is saved
+        await store.flush()
+        return held, current
+
+    held, current = asyncio.run(run())
+    np.testing.assert_array_equal(held, old)
+    np.testing.assert_array_equal(current, new)
+    assert [p.name for p in store.vectors_dir.iterdir()] == [store._manifest["chunk-a"]["file"]]
+
+
+def test_crash_before_manifest_save_keeps_saved_version(tmp_path):
+    old = np.arange(32, dtype=np.float32).reshape(4, 8)
+
+    async def run():
+        store = MultiVectorStore(store_path=tmp_path, dtype="float32")
+        store.flush_interval = 60.0
+        await store.add("chunk-a", old)
+        await store.add("chunk-b", old)
+        await store.flush()
+        # Re-add and delete, then "crash" before the deferred save runs
+        await store.add("chunk-a", np.zeros((2, 8), dtype=np.float32))
+        await store.delete("chunk-b")
+        store._flush_task.cancel()
+
+    asyncio.run(run())
+    reopened = MultiVectorStore(store_path=tmp_path, dtype="float32")
+    restored = asyncio.run(reopened.batch_get(["chunk-a", "chunk-b"]))
+    np.testing.assert_array_equal(restored["chunk-a"], old)
+    np.testing.assert_array_equal(restored["chunk-b"], old)
+    # The unsaved version's file was an orphan and is removed on load
+    assert len(list(reopened.vectors_dir.iterdir())) == 2
+
+
+def test_batch_get_skips_missing_and_truncated_files(tmp_path):
+    store = MultiVectorStore(store_path=tmp_path, dtype="float16")
+
+    async def run():
+        for cid in ("chunk-a", "chunk-b", "chunk-c"):
+            await store.add(cid, np.ones((3, 4)))
+        (store.vectors_dir / store._manifest["chunk-a"]["file"]).unlink()
+        with open(store.vectors_dir / store._manifest["chunk-b"]["file"], "r+b") as f:
+            f.truncate(4)
+        return await store.batch_get(["chunk-a", "chunk-b", "chunk-c"]), await store.get("chunk-a")
+
+    restored, single = asyncio.run(run())
+    assert list(restored) == ["chunk-c"]
+    assert single is None
@@ -0,0 +1,67 @@
+"""
+Tests for the query-result similarity cache in front of SingleVectorStore.query
+"""
+
+import numpy as np
+
+from storage.single_vector_store import _SimilarityCache
+
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def _results(*chunk_ids: str):
+    return [{"chunk_id": cid, "score": 1.0, "metadata": {}} for cid in chunk_ids]
+
+
+def test_near_duplicate_query_hits_and_dissimilar_query_misses():
+    rng = np.random.default_rng(0)
+    cache = _SimilarityCache(size=8, threshold=0.97)
+    base = _unit(rng.standard_normal(64))
+    cache.put(base, top_k=3, filter_key="", results=_results("a", "b", "c"), generation=cache.generation)
+
+    near = _unit(base + 0.01 * rng.standard_normal(64))
+    assert float(near @ base) >= 0.97
+    hit = cache.get(near, top_k=2, filter_key="")
+    assert [r["chunk_id"] for r in hit] == ["a", "b"]
+
+    far = _unit(rng.standard_normal(64))
+    assert float(far @ base) < 0.97
+    assert cache.get(far, top_k=2, filter_key="") is None
+
+
+def test_miss_on_other_filter_or_larger_top_k():
+    cache = _SimilarityCache(size=8, threshold=0.97)
+    key = _unit(np.ones(16))
+    cache.put(key, top_k=3, filter_key="", results=_results("a", "b", "c"), generation=cache.generation)
+
+    assert cache.get(key, top_k=5, filter_key="") is None
+    assert cache.get(key, top_k=3, filter_key='{"doc_id": "x"}') is None
+
+
+def test_lru_eviction_and_clear():
+    cache = _SimilarityCache(size=2, threshold=0.97)
+    keys = [_unit(np.eye(4, dtype=np.float32)[i]) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, top_k=1, filter_key="", results=_results(str(i)), generation=cache.generation)
+    cache.get(keys[0], top_k=1, filter_key="")  # keys[0] becomes most recently used
+    cache.put(keys[2], top_k=1, filter_key="", results=_results("2"), generation=cache.generation)
+
+    assert cache.get(keys[1], top_k=1, filter_key="") is None
+    assert cache.get(keys[0], top_k=1, filter_key="") is not None
+
+    stale_generation = cache.generation
+    cache.clear()
+    assert cache.get(keys[0], top_k=1, filter_key="") is None
+    cache.put(keys[0], top_k=1, filter_key="", results=_results("0"), generation=stale_generation)
+    assert cache.get(keys[0], top_k=1, filter_key="") is None
+
+
+def test_returned_results_are_copies():
+    cache = _SimilarityCache(size=4, threshold=0.97)
+    key = _unit(np.ones(8))
+    cache.put(key, top_k=1, filter_key="", results=_results("a"), generation=cache.generation)
+    cache.get(key, top_k=1, filter_key="")[0]["score"] = -1.0
+    assert cache.get(key, top_k=1, filter_key="")[0]["score"] == 1.0
@@ -0,0 +1,61 @@
+"""
+Concurrency limits for bursty best-effort I/O (chunk file reads/deletes, per-id store calls)
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class IOLimiter:
+    """
+    Semaphore gate for fan-out I/O with simple counters for tuning.
+
+    Wrap each per-item coroutine with `await limiter.run(coro)` so a gather over
+    thousands of chunks keeps at most `limit` operations in flight.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+
+    async def run(self, aw: Awaitable[Any]) -> Any:
+        """Await `aw` once a slot is free."""
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            # Never started: close the coroutine to avoid "never awaited" warnings
+            if asyncio.iscoroutine(aw):
+                aw.close()
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            return await aw
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Current limiter counters."""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+        }
+
+
+# Shared gate for chunk file I/O and per-id vector store fallbacks
+io_limiter = IOLimiter(settings.max_io_concurrency)
@@ -0,0 +1,305 @@
+"""
+Batched file I/O for many small files (chunk PDFs)
+
+Backends (settings.io_backend):
+- "thread": one worker thread per file via asyncio.to_thread, bounded by
+  utils.concurrency.io_limiter (default)
+- "uring": Linux io_uring via the optional `liburing` package; opens, reads,
+  closes and unlinks are each submitted as one batch per ring window;
+  streamed writes go through a per-file ring.
+  Falls back to "thread" if liburing is missing or the ring cannot be set up.
+"""
+
+import asyncio
+import errno
+import logging
+import os
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any
+
+from core.config import settings
+from utils.concurrency import io_limiter
+
+logger = logging.getLogger(__name__)
+
+# Optional: io_uring bindings (Linux only)
+try:
+    from liburing import (
+        io_uring, io_uring_cqe, io_uring_queue_init, io_uring_queue_exit,
+        io_uring_get_sqe, io_uring_submit, io_uring_wait_cqe, io_uring_cqe_seen,
+        io_uring_sqe_set_data64, io_uring_prep_openat, io_uring_prep_read,
+        io_uring_prep_write, io_uring_prep_close, io_uring_prep_unlinkat,
+        iovec, AT_FDCWD, O_RDONLY,
+    )
+    LIBURING_AVAILABLE = True
+except ImportError:
+    LIBURING_AVAILABLE = False
+
+URING_ENTRIES = 64  # Ring size; larger batches are submitted in windows of this size
+
+
+def _use_uring() -> bool:
+    if settings.io_backend != "uring":
+        return False
+    if not LIBURING_AVAILABLE:
+        logger.warning("io_backend='uring' but liburing is not installed; using thread backend")
+        return False
+    return True
+
+
+async def read_many(
+    paths: List[str],
+    transform: Optional[Callable[[bytes], Any]] = None
+) -> List[Any]:
+    """
+    Read many files concurrently.
+
+    Args:
+        paths: File paths to read
+        transform: Optional function applied to each file's bytes in the worker thread
+            (e.g. base64 encoding)
+
+    Returns:
+        File contents (transformed if given), in the order of paths
+
+    Raises:
+        OSError: If any file cannot be read
+    """
+    if not paths:
+        return []
+
+    if _use_uring():
+        try:
+            contents = await asyncio.to_thread(_uring_read_many, paths)
+            if transform:
+                contents = await asyncio.to_thread(lambda: [transform(c) for c in contents])
+            return contents
+        except _UringSetupError as e:
+            logger.warning(f"io_uring unavailable ({e}); using thread backend")
+
+    def read_one(path: str) -> Any:
+        with open(path, "rb") as f:
+            data = f.read()
+        return transform(data) if transform else data
+
+    return await asyncio.gather(*(io_limiter.run(asyncio.to_thread(read_one, p)) for p in paths))
+
+
+async def unlink_many(paths: List[str]) -> List[Optional[Exception]]:
+    """
+    Delete many files concurrently; missing files are ignored.
+
+    Returns:
+        One entry per path: None on success, or the exception raised
+    """
+    if not paths:
+        return []
+
+    if _use_uring():
+        try:
+            return await asyncio.to_thread(_uring_unlink_many, paths)
+        except _UringSetupError as e:
+            logger.warning(f"io_uring unavailable ({e}); using thread backend")
+
+    results = await asyncio.gather(
+        *(io_limiter.run(asyncio.to_thread(os.unlink, p)) for p in paths), return_exceptions=True
+    )
+    return [None if r is None or isinstance(r, FileNotFoundError) else r for r in results]
+
+
+async def write_stream(path: str, chunks: AsyncIterator[bytes], fsync: bool = False) -> int:
+    """
+    Write an async stream of byte chunks to a file (created or truncated).
+
+    Each chunk is written from a worker thread as it arrives, so the whole
+    file is never held in memory. With fsync=True the data is flushed to
+    stable storage before the file is closed.
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        OSError: If the file cannot be written
+        Exception: Any error raised by the chunk stream is propagated
+    """
+    if _use_uring():
+        try:
+            writer = await asyncio.to_thread(_UringWriter, path)
+        except _UringSetupError as e:
+            logger.warning(f"io_uring unavailable ({e}); using thread backend")
+        else:
+            try:
+                async for chunk in chunks:
+                    await asyncio.to_thread(writer.write, chunk)
+                if fsync:
+                    await asyncio.to_thread(os.fsync, writer.fd)
+            finally:
+                await asyncio.to_thread(writer.close)
+            return writer.offset
+
+    written = 0
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(f.write, chunk)
+            written += len(chunk)
+        if fsync:
+            await asyncio.to_thread(_flush_and_fsync, f)
+    finally:
+        await asyncio.to_thread(f.close)
+    return written
+
+
+def _flush_and_fsync(f) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+
+
+# ------------------------
+# io_uring backend (blocking; run in a worker thread)
+# ------------------------
+
+class _UringSetupError(RuntimeError):
+    """Ring could not be created (e.g. io_uring disabled by the kernel or seccomp)"""
+
+
+def _uring_submit_batch(ring, cqe, indices: List[int], prep: Callable) -> Dict[int, int]:
+    """Prepare one SQE per index, submit them with a single syscall and reap all CQEs."""
+    for i in indices:
+        sqe = io_uring_get_sqe(ring)
+        prep(sqe, i)
+        io_uring_sqe_set_data64(sqe, i)
+    io_uring_submit(ring)
+
+    results = {}
+    for _ in indices:
+        io_uring_wait_cqe(ring, cqe)
+        results[cqe.user_data] = cqe.res
+        io_uring_cqe_seen(ring, cqe)
+    return results
+
+
+def _uring_error(res: int, path: str) -> OSError:
+    return OSError(-res, os.strerror(-res), path)
+
+
+def _uring_run(paths: List[str], window_fn: Callable) -> None:
+    ring = io_uring()
+    cqe = io_uring_cqe()
+    try:
+        io_uring_queue_init(URING_ENTRIES, ring, 0)
+    except Exception as e:
+        raise _UringSetupError(str(e))
+    try:
+        for start in range(0, len(paths), URING_ENTRIES):
+            window_fn(ring, cqe, list(range(start, min(start + URING_ENTRIES, len(paths)))))
+    finally:
+        io_uring_queue_exit(ring)
+
+
+def _uring_read_many(paths: List[str]) -> List[bytes]:
+    encoded = [os.fsencode(p) for p in paths]
+    contents: List[Optional[bytes]] = [None] * len(paths)
+
+    def read_window(ring, cqe, indices: List[int]) -> None:
+        # 1) open all files
+        fds = _uring_submit_batch(
+            ring, cqe, indices,
+            lambda sqe, i: io_uring_prep_openat(sqe, encoded[i], O_RDONLY, 0, AT_FDCWD)
+        )
+        opened = [i for i in indices if fds[i] >= 0]
+        try:
+            failed = [i for i in indices if fds[i] < 0]
+            if failed:
+                raise _uring_error(fds[failed[0]], paths[failed[0]])
+
+            # 2) read each file whole into a buffer sized from fstat
+            buffers = {i: iovec(bytearray(os.fstat(fds[i]).st_size)) for i in opened}
+            nread = _uring_submit_batch(
+                ring, cqe, opened,
+                lambda sqe, i: io_uring_prep_read(sqe, fds[i], buffers[i].iov_base, buffers[i].iov_len, 0)
+            )
+            for i in opened:
+                if nread[i] < 0:
+                    raise _uring_error(nread[i], paths[i])
+                data = bytes(buffers[i].iov_base[:nread[i]])
+                # Short read (rare for regular files): finish synchronously
+                while len(data) < buffers[i].iov_len:
+                    more = os.pread(fds[i], buffers[i].iov_len - len(data), len(data))
+                    if not more:
+                        break
+                    data += more
+                contents[i] = data
+        finally:
+            # 3) close everything that was opened
+            if opened:
+                _uring_submit_batch(ring, cqe, opened, lambda sqe, i: io_uring_prep_close(sqe, fds[i]))
+
+    _uring_run(paths, read_window)
+    return contents
+
+
+def _uring_unlink_many(paths: List[str]) -> List[Optional[Exception]]:
+    encoded = [os.fsencode(p) for p in paths]
+    errors: List[Optional[Exception]] = [None] * len(paths)
+
+    def unlink_window(ring, cqe, indices: List[int]) -> None:
+        results = _uring_submit_batch(
+            ring, cqe, indices,
+            lambda sqe, i: io_uring_prep_unlinkat(sqe, encoded[i], 0, AT_FDCWD)
+        )
+        for i in indices:
+            res = results[i]
+            if res < 0 and -res != errno.ENOENT:
+                errors[i] = _uring_error(res, paths[i])
+
+    _uring_run(paths, unlink_window)
+    return errors
+
+
+class _UringWriter:
+    """Sequential file writer that submits open/write/close through one io_uring ring."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self._ring = io_uring()
+        self._cqe = io_uring_cqe()
+        try:
+            io_uring_queue_init(URING_ENTRIES, self._ring, 0)
+        except Exception as e:
+            raise _UringSetupError(str(e))
+
+        encoded = os.fsencode(path)
+        fd = self._submit_one(
+            lambda sqe: io_uring_prep_openat(
+                sqe, encoded, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, AT_FDCWD
+            )
+        )
+        if fd < 0:
+            io_uring_queue_exit(self._ring)
+            raise _uring_error(fd, path)
+        self.fd = fd
+
+    def _submit_one(self, prep: Callable) -> int:
+        return _uring_submit_batch(self._ring, self._cqe, [0], lambda sqe, _: prep(sqe))[0]
+
+    def write(self, data: bytes) -> None:
+        done = 0
+        while done < len(data):
+            # Fresh iovec per attempt so a short write resubmits only the remainder
+            iov = iovec(bytearray(data[done:]))
+            res = self._submit_one(
+                lambda sqe: io_uring_prep_write(sqe, self.fd, iov.iov_base, iov.iov_len, self.offset + done)
+            )
+            if res < 0:
+                raise _uring_error(res, self.path)
+            done += res
+        self.offset += done
+
+    def close(self) -> None:
+        try:
+            res = self._submit_one(lambda sqe: io_uring_prep_close(sqe, self.fd))
+            if res < 0:
+                raise _uring_error(res, self.path)
+        finally:
+            io_uring_queue_exit(self._ring)
@@ -1,19 +1,72 @@
+import asyncio
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv 
 import httpx
 import json
 import os
 from bs4 import BeautifulSoup
+from cachetools import TTLCache
 
-load_dotenv()
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+    LexborHTMLParser = None
 
-mcp = FastMCP('documentation')
+load_dotenv()
 
 USER_AGENT = "docs-app/1.0"
 SERPER_URL = "https://google.serper.dev/search"
+MAX_HTML_CHARS = 200_000  # Raw HTML parsed per page; docs text beyond this is never returned
 # TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 # TAVILY_URL = "https://api.tavily.com/search"
 
+# One client for all requests, so searches and page fetches reuse pooled keep-alive connections
+client = httpx.AsyncClient(
+    follow_redirects=True,
+    timeout=30.0,
+    headers={"User-Agent": USER_AGENT},
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+)
+
+
+# Successful results only; errors are never cached
+_search_cache = TTLCache(maxsize=256, ttl=600)    # query -> Serper response
+_fetch_cache = TTLCache(maxsize=2048, ttl=3600)   # (max_chars, url) -> truncated page text
+_inflight: dict[tuple[int, object], asyncio.Task] = {}
+_MISSING = object()
+
+
+async def _single_flight(cache: TTLCache, key, load):
+    """Return cache[key], running load() once for concurrent callers that miss together"""
+    # get() rather than `in` + [], which raises KeyError if the entry expires in between
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    inflight_key = (id(cache), key)
+    task = _inflight.get(inflight_key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _inflight[inflight_key] = task
+        task.add_done_callback(lambda _: _inflight.pop(inflight_key, None))
+    # Shielded: one cancelled caller must not cancel the load the others are awaiting
+    value = await asyncio.shield(task)
+    cache[key] = value
+    return value
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+mcp = FastMCP('documentation', lifespan=lifespan)
+
 docs_url = {
     "langchain": "python.langchain.com/docs", 
     "llama-index": "docs.llamaindex.ai/en/stable",
@@ -21,7 +74,7 @@ docs_url = {
 }
 
 
-async def search_web(query: str) -> dict | None:
+async def _search(query: str) -> dict:
     payload = json.dumps({
         "q": query,
         "num": 2
@@ -30,37 +83,44 @@ async def search_web(query: str) -> dict | None:
         "X-API-KEY": os.getenv("SERPER_API_KEY"),
         "Content-Type": "application/json",
     }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                SERPER_URL, headers=headers, data=payload, timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": f"HTTP error: {e}"}
-        except Exception as e:
-            return {"error": f"An error occurred: {e}"}
-
-
-async def fetch_url(url: str):
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        try:
-            response = await client.get(
-                url,
-                timeout=30.0,
-                headers={"User-Agent": USER_AGENT},
-            )
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            text = soup.get_text()
-            return text
-        except httpx.HTTPStatusError as e:
-            return f"HTTP error {e.response.status_code}: {e}"
-        except httpx.TimeoutException:
-            return "Timeout error"
-        except Exception as e:
-            return f"Error fetching URL: {e}"
+    response = await client.post(SERPER_URL, headers=headers, data=payload)
+    response.raise_for_status()
+    return response.json()
+
+
+async def search_web(query: str) -> dict | None:
+    try:
+        return await _single_flight(_search_cache, query, lambda: _search(query))
+    except httpx.HTTPStatusError as e:
+        return {"error": f"HTTP error: {e}"}
+    except Exception as e:
+        return {"error": f"An error occurred: {e}"}
+
+
+def html_to_text(html: str) -> str:
+    """Extract page text with selectolax's C parser, falling back to BeautifulSoup"""
+    if SELECTOLAX_AVAILABLE:
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(["script", "style"])
+        return tree.body.text(separator=" ", strip=True) if tree.body else ""
+    return BeautifulSoup(html, "html.parser").get_text()
+
+
+async def _fetch_text(url: str, max_chars: int) -> str:
+    response = await client.get(url)
+    response.raise_for_status()
+    return html_to_text(response.text[:MAX_HTML_CHARS])[:max_chars]
+
+
+async def fetch_url(url: str, max_chars: int = 5000):
+    try:
+        return await _single_flight(_fetch_cache, (max_chars, url), lambda: _fetch_text(url, max_chars))
+    except httpx.HTTPStatusError as e:
+        return f"HTTP error {e.response.status_code}: {e}"
+    except httpx.TimeoutException:
+        return "Timeout error"
+    except Exception as e:
+        return f"Error fetching URL: {e}"
 
 
 @mcp.tool()
@@ -91,12 +151,14 @@ async def get_docs(query: str, library: str = "langchain"):
     if "organic" not in results or not results["organic"]:
         return "No results found"
     
-    # Fetch content from top 3 results 
-    text_parts = []
-    for result in results["organic"][:3]:
-        if "link" in result:
-            content = await fetch_url(result["link"])
-            text_parts.append(f"URL: {result['link']}\n{content[:4000]}...")
+    # Fetch content from top 3 results concurrently
+    links = [result["link"] for result in results["organic"][:3] if "link" in result]
+    contents = await asyncio.gather(*(fetch_url(link, max_chars=4000) for link in links), return_exceptions=True)
+    text_parts = [
+        f"URL: {link}\n{content}..."
+        for link, content in zip(links, contents)
+        if not isinstance(content, BaseException)
+    ]
     output = "\n\n---\n\n".join(text_parts)
     return output if output else "No results found"
 